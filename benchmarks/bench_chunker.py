@@ -0,0 +1,63 @@
+"""
+Micro-benchmark: the old CharacterTextSplitter + clean_text path against the single-pass Chunker.
+
+Run from the repository root:
+    python -m benchmarks.bench_chunker --pages 2000
+"""
+import argparse
+import logging
+import random
+import time
+from langchain_text_splitters import CharacterTextSplitter
+from langchain_core.documents import Document
+from tasks.task_5.task_5 import clean_text
+from tasks.task_5.chunker import Chunker
+
+WORDS = ["entropy", "vector", "lecture", "theorem", "mitochondria", "photosynthesis", "équation",
+         "derivative", "integral", "café", "protocol", "ledger", "\x0cfootnote", "tab\there"]
+
+def make_pages(num_pages, seed=0):
+    """
+    Synthetic pages shaped like PyPDF output: paragraphs separated by blank lines, with a few
+    non-ASCII and control characters for the cleaner to remove.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for page in range(num_pages):
+        paragraphs = []
+        for _ in range(rng.randint(4, 12)):
+            paragraphs.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))))
+        pages.append(Document(page_content="\n\n".join(paragraphs), metadata={"source": "synthetic.pdf", "page": page}))
+    return pages
+
+def legacy_chunks(pages):
+    text_splitter = CharacterTextSplitter(separator="\n\n", chunk_size=1000, chunk_overlap=200)
+    texts = []
+    for doc in pages:
+        texts.extend(text_splitter.split_text(doc.page_content))
+    return [Document(page_content=clean_text(text)) for text in texts]
+
+def chunker_chunks(pages):
+    return list(Chunker(separator="\n\n", chunk_size=1000, chunk_overlap=200).split_documents(pages))
+
+def best_of(fn, pages, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(pages)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    # CharacterTextSplitter logs every oversized chunk; keep that I/O out of the timings
+    logging.disable(logging.WARNING)
+
+    pages = make_pages(args.pages)
+    chars = sum(len(p.page_content) for p in pages)
+    for name, fn in (("CharacterTextSplitter + clean_text", legacy_chunks), ("Chunker", chunker_chunks)):
+        seconds, chunks = best_of(fn, pages, args.repeats)
+        print(f"{name:<36} {seconds * 1000:9.1f} ms  {chars / seconds / 1e6:7.1f} MB/s  {len(chunks)} chunks")
@@ -0,0 +1,95 @@
+"""
+Benchmark: cold import time of the tasks modules, with a budget that fails on regressions.
+
+Every module is imported in a fresh interpreter with -X importtime; the best of --repeat runs is compared
+with its budget. Each import is also checked for side effects: it must not print, must not change
+environment variables and must not load any of the heavy backends (Streamlit, Chroma, Vertex AI,
+langchain_community), which are only imported on first use.
+
+Exits with status 1 if a module is over budget or has side effects, so it can guard CI.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Milliseconds; generous enough for a slow CI machine, far below what eager backend imports cost
+BUDGETS_MS = {
+    "tasks.task_3.task_3": 600,
+    "tasks.task_4.task_4": 300,
+    "tasks.task_5.task_5": 1500,
+    "tasks.task_8.task_8": 1500,
+    "tasks.task_9.task_9": 100,
+    "tasks.resources": 50,
+}
+
+HEAVY_MODULES = ["streamlit", "chromadb", "langchain_google_vertexai", "vertexai", "langchain_community", "pypdf"]
+
+# Imports the module and reports what it left behind as JSON on stdout
+_PROBE = """
+import contextlib, io, json, os, sys
+environment = dict(os.environ)
+output = io.StringIO()
+with contextlib.redirect_stdout(output):
+    import {module}
+print(json.dumps({{
+    "printed": output.getvalue(),
+    "environment_changes": sorted(k for k in set(os.environ) | set(environment) if os.environ.get(k) != environment.get(k)),
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+def import_time_ms(module, root):
+    """
+    Cumulative import time of module in a fresh interpreter, in milliseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No import time reported for {module}")
+
+def side_effects(module, root):
+    """
+    Returns a description of every side effect of importing module (empty if there are none).
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=root, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.splitlines()[-1])
+    problems = []
+    if report["printed"]:
+        problems.append(f"prints {report['printed'].strip()!r}")
+    if report["environment_changes"]:
+        problems.append(f"sets {', '.join(report['environment_changes'])}")
+    if report["heavy_modules"]:
+        problems.append(f"loads {', '.join(report['heavy_modules'])}")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplies every budget, for slower machines")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    failed = False
+    print(f"{'module':<24} {'ms':>8} {'budget':>8}  result")
+    for module, budget in BUDGETS_MS.items():
+        budget *= args.scale
+        elapsed = min(import_time_ms(module, root) for _ in range(args.repeat))
+        problems = side_effects(module, root)
+        if elapsed > budget:
+            problems.insert(0, "over budget")
+        failed |= bool(problems)
+        print(f"{module:<24} {elapsed:8.1f} {budget:8.0f}  {'; '.join(problems) or 'ok'}")
+    sys.exit(1 if failed else 0)
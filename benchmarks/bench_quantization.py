@@ -0,0 +1,58 @@
+"""
+Benchmark: recall@k against memory for the NumpyVectorStore storage options.
+
+Vectors are drawn around random cluster centres (as document chunks on a handful of topics are),
+queries are perturbed copies of stored vectors, and exact float32 search is the ground truth.
+
+Run from the repository root:
+    python -m benchmarks.bench_quantization --vectors 100000 --dim 768
+"""
+import argparse
+import time
+import numpy as np
+from langchain_core.documents import Document
+from tasks.task_5.vector_index import NumpyVectorStore
+
+CONFIGS = [
+    ("float32", False),
+    ("float16", False),
+    ("float16", True),
+    ("int8", False),
+    ("int8", True),
+]
+
+def make_corpus(num_vectors, dim, num_queries, clusters=50, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, num_vectors)] + 0.6 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    queries = vectors[rng.integers(0, num_vectors, num_queries)] + 0.3 * rng.standard_normal((num_queries, dim)).astype(np.float32)
+    return vectors, queries
+
+def ids_of(results):
+    return [[doc.metadata["i"] for doc, _ in hits] for hits in results]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors, queries = make_corpus(args.vectors, args.dim, args.queries)
+    documents = [Document(page_content="", metadata={"i": i}) for i in range(args.vectors)]
+    truth = None
+
+    print(f"{'storage':<18} {'RAM MB':>8} {'recall@' + str(args.k):>10} {'ms/query':>9}")
+    for dtype, rescore in CONFIGS:
+        store = NumpyVectorStore(None, dtype=dtype, rescore=rescore)
+        store.add_vectors(vectors, documents)
+        start = time.perf_counter()
+        found = ids_of(store.search_by_vectors(queries, args.k))
+        per_query = (time.perf_counter() - start) / args.queries * 1000
+        if truth is None:
+            truth = found  # The first config is exact float32 search
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, truth)])
+        label = dtype + (" + rescore" if rescore else "")
+        print(f"{label:<18} {store.memory_bytes() / 1e6:8.1f} {recall:10.4f} {per_query:9.3f}")
+        store.close()
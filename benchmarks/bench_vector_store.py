@@ -0,0 +1,93 @@
+"""
+Benchmark: NumpyVectorStore against Chroma for build time, query latency and memory.
+
+Both stores get the same random unit vectors through a lookup-table embedder, so embedding cost is
+excluded and only storage and search are measured. Each store runs in its own process so resident
+memory growth can be attributed to it.
+
+Run from the repository root:
+    python -m benchmarks.bench_vector_store --chunks 5000 --queries 200
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+import numpy as np
+from langchain_core.documents import Document
+
+def rss_bytes():
+    """
+    Current resident set size of this process, from /proc (Linux) or getrusage peak elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class TableEmbeddings:
+    """
+    Returns precomputed vectors: text "chunk <i>" maps to row i of the table, queries embed via query_table.
+    """
+    def __init__(self, table, query_table):
+        self.table = table
+        self.query_table = query_table
+
+    def embed_documents(self, texts):
+        return [self.table[int(text.split()[1])].tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self.query_table[int(text.split()[1])].tolist()
+
+def make_vectors(n, dim, seed):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def run_store(name, chunks, queries, dim, k, results):
+    from langchain_community.vectorstores import Chroma
+    from tasks.task_5.vector_index import NumpyVectorStore
+
+    embeddings = TableEmbeddings(make_vectors(chunks, dim, 0), make_vectors(queries, dim, 1))
+    documents = [Document(page_content=f"chunk {i}", metadata={"page": i}) for i in range(chunks)]
+    before = rss_bytes()
+    start = time.perf_counter()
+    if name == "chroma":
+        db = Chroma(collection_name=f"bench{int(time.time() * 1000)}", embedding_function=embeddings)
+        for i in range(0, chunks, 1000):
+            db.add_documents(documents[i:i + 1000])
+    else:
+        db = NumpyVectorStore.from_documents(documents, embeddings)
+    build = time.perf_counter() - start
+    memory = rss_bytes() - before
+
+    latencies = []
+    for q in range(queries):
+        start = time.perf_counter()
+        db.similarity_search_with_relevance_scores(f"query {q}", k=k)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.asarray(latencies) * 1000
+    results[name] = {
+        "build_s": build,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "rss_growth_mb": memory / 1e6,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    results = multiprocessing.Manager().dict()
+    for name in ("chroma", "numpy"):
+        process = multiprocessing.Process(target=run_store, args=(name, args.chunks, args.queries, args.dim, args.k, results))
+        process.start()
+        process.join()
+
+    print(f"{'store':<8} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS +MB':>8}")
+    for name, r in results.items():
+        print(f"{name:<8} {r['build_s']:8.2f} {r['p50_ms']:8.3f} {r['p99_ms']:8.3f} {r['rss_growth_mb']:8.1f}")
@@ -0,0 +1,223 @@
+"""
+Benchmark: the whole Quizzify pipeline, end to end, against local stand-ins for the model APIs.
+
+Synthetic PDFs (see synthetic_pdf.py) go through the real path: DocumentProcessor parses them,
+ChromaCollectionCreator chunks, embeds and indexes them, the collection is queried, QuizGenerator writes
+quizzes and QuizManager serves them from a QuestionStore. Embeddings come from a FakeEmbeddingServer and
+questions from a FakeLLMServer (see fake_servers.py), both with configurable latency and failure rates,
+so a run needs no cloud access and is repeatable.
+
+Reported: pages/s (parsing), chunks/s (chunking), embeddings/s (embedding and indexing), retrieval p50/p99,
+questions/s (quiz generation), quiz-serving time and the peak resident memory of the process.
+Every run is written to benchmarks/results/ as JSON, tagged with the current commit; --compare prints the
+change against an earlier result file.
+
+Run from the repository root:
+    python -m benchmarks.e2e --documents 4 --pages 25 --llm-latency 0.3 --llm-failure-rate 0.1
+    python -m benchmarks.e2e --compare benchmarks/results/e2e-<commit>-<time>.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.fake_servers import FakeEmbeddingServer, FakeLLMServer, HTTPEmbeddings, HTTPLLM
+from benchmarks.synthetic_pdf import TOPICS, synthetic_document
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Metric -> True if larger is better; used by --compare
+METRICS = {
+    "pages_per_second": True,
+    "chunks_per_second": True,
+    "embeddings_per_second": True,
+    "retrieval_p50_ms": False,
+    "retrieval_p99_ms": False,
+    "questions_per_second": True,
+    "time_to_first_question_ms": False,
+    "serve_ms_per_question": False,
+    "peak_rss_mb": False,
+}
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process so far (ru_maxrss is in KiB on Linux, bytes on macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def current_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(args):
+    from tasks.task_3.task_3 import DocumentProcessor
+    from tasks.task_4.task_4 import EmbeddingClient
+    from tasks.task_5.task_5 import ChromaCollectionCreator
+    from tasks.task_8.task_8 import QuizGenerator
+    from tasks.task_9.question_store import QuestionStore
+    from tasks.task_9.task_9 import QuizManager
+
+    files = [(f"synthetic-{i}.pdf", synthetic_document(args.pages, seed=args.seed + i)) for i in range(args.documents)]
+    topics = list(TOPICS)
+    metrics = {}
+    counts = {}
+
+    embedding_server = FakeEmbeddingServer(
+        dim=args.dim, latency=args.embedding_latency, failure_rate=args.embedding_failure_rate, seed=args.seed
+    )
+    llm_server = FakeLLMServer(latency=args.llm_latency, failure_rate=args.llm_failure_rate, seed=args.seed)
+    with embedding_server, llm_server:
+        # Parsing
+        processor = DocumentProcessor(parallel=args.parallel_parsing)
+        start = time.perf_counter()
+        processor.process_files(files)
+        seconds = time.perf_counter() - start
+        counts["pages"] = len(processor.pages)
+        metrics["pages_per_second"] = counts["pages"] / seconds
+
+        embed_client = EmbeddingClient(
+            "fake-embedding", None, None, batch_size=args.embedding_batch_size, max_workers=args.embedding_workers,
+            requests_per_second=args.embedding_rps, backend=HTTPEmbeddings(embedding_server.url, query_retries=3),
+        )
+        creator = ChromaCollectionCreator(processor, embed_client, store=args.store)
+
+        # Chunking on its own; the build below chunks again, so its rate is mostly embedding and indexing
+        start = time.perf_counter()
+        counts["chunks"] = sum(1 for _ in creator.chunker.split_documents(processor.pages))
+        metrics["chunks_per_second"] = counts["chunks"] / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        creator.create_chroma_collection()
+        metrics["embeddings_per_second"] = counts["chunks"] / (time.perf_counter() - start)
+
+        # Retrieval: one query embedding plus one similarity search per query
+        latencies = []
+        for i in range(args.queries):
+            start = time.perf_counter()
+            creator.db.similarity_search(topics[i % len(topics)], k=4)
+            latencies.append(time.perf_counter() - start)
+        metrics["retrieval_p50_ms"] = float(np.percentile(latencies, 50)) * 1000
+        metrics["retrieval_p99_ms"] = float(np.percentile(latencies, 99)) * 1000
+
+        # Quiz generation, one quiz per topic in turn
+        quizzes = []
+        first_question = []
+        start = time.perf_counter()
+        for i in range(args.quizzes):
+            topic = topics[i % len(topics)]
+            generator = QuizGenerator(topic, args.num_questions, creator, context_strategy=args.context_strategy)
+            generator.llm = HTTPLLM(url=llm_server.url)
+            questions = generator.generate_quiz(max_concurrency=args.max_concurrency, batch=args.batch)
+            quizzes.append((topic, questions))
+            if generator.stats["time_to_first_question"] is not None:
+                first_question.append(generator.stats["time_to_first_question"])
+        seconds = time.perf_counter() - start
+        counts["questions"] = sum(len(questions) for _, questions in quizzes)
+        counts["questions_requested"] = args.quizzes * args.num_questions
+        metrics["questions_per_second"] = counts["questions"] / seconds
+        metrics["time_to_first_question_ms"] = float(np.mean(first_question)) * 1000 if first_question else None
+
+        # Serving: store every quiz, then page through it with QuizManager like the app does
+        with tempfile.TemporaryDirectory() as directory:
+            store = QuestionStore(os.path.join(directory, "questions.sqlite"))
+            corpus_hash = processor.corpus_hash()
+            for topic, questions in quizzes:
+                store.add_many(corpus_hash, topic, questions)
+            start = time.perf_counter()
+            served = 0
+            for topic, questions in quizzes:
+                manager = QuizManager.from_store(store, store.take(corpus_hash, topic, len(questions)))
+                for index in range(manager.total_questions):
+                    manager.get_question_at_index(index)
+                    served += 1
+            metrics["serve_ms_per_question"] = (time.perf_counter() - start) * 1000 / served if served else None
+            store.db.close()
+
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return {
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "counts": counts,
+        "metrics": metrics,
+        "servers": {"embedding": embedding_server.stats, "llm": llm_server.stats},
+    }
+
+def save(result, directory=RESULTS_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"e2e-{result['commit']}-{result['timestamp'].replace(':', '')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+def print_report(result, baseline=None):
+    header = f"{'metric':<28} {'value':>12}"
+    if baseline:
+        header += f" {'baseline':>12} {'change':>9}"
+    print(header)
+    for name, larger_is_better in METRICS.items():
+        value = result["metrics"].get(name)
+        line = f"{name:<28} {value if value is not None else float('nan'):12.2f}"
+        if baseline:
+            old = baseline["metrics"].get(name)
+            if value is not None and old:
+                change = (value - old) / old * 100
+                worse = change < 0 if larger_is_better else change > 0
+                line += f" {old:12.2f} {change:+8.1f}%{' worse' if worse and abs(change) >= 5 else ''}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=4, help="Synthetic PDFs to process")
+    parser.add_argument("--pages", type=int, default=25, help="Pages per PDF")
+    parser.add_argument("--parallel-parsing", action="store_true", help="Parse the PDFs in a process pool")
+    parser.add_argument("--store", default="numpy", choices=["numpy", "chroma"])
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimension")
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="Seconds per embedding request")
+    parser.add_argument("--embedding-failure-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--embedding-batch-size", type=int, default=32)
+    parser.add_argument("--embedding-workers", type=int, default=4)
+    parser.add_argument("--embedding-rps", type=float, default=50.0, help="Initial embedding request rate")
+    parser.add_argument("--queries", type=int, default=200, help="Retrieval queries to time")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per LLM request")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Fraction of LLM requests answered 429")
+    parser.add_argument("--quizzes", type=int, default=6)
+    parser.add_argument("--num-questions", type=int, default=5, help="Questions per quiz, at most 10")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="LLM requests in flight per quiz")
+    parser.add_argument("--batch", action="store_true", help="Ask for a whole quiz in one LLM call")
+    parser.add_argument("--context-strategy", default="round_robin", choices=["round_robin", "mmr"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", default=None, help="Earlier result file to compare this run with")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    parser.add_argument("--no-save", action="store_true", help="Do not write the result file")
+    args = parser.parse_args()
+
+    # Streamlit calls in the pipeline are no-ops outside an app; keep their warnings out of the report
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.disable(logging.WARNING)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # The pipeline prints a line per question; --verbose keeps it
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        result = run(args)
+    print(f"commit {result['commit']}: {result['counts']}")
+    print_report(result, baseline)
+    print(f"servers: {result['servers']}")
+    if not args.no_save:
+        print(f"Saved {save(result)}")
@@ -0,0 +1,265 @@
+"""
+Local stand-ins for the remote model APIs, for exercising the pipeline without cloud access.
+
+FakeEmbeddingServer answers POST /embed {"texts": [...]} with deterministic vectors after a configurable
+latency, and fails a configurable fraction of requests with HTTP 429 (quota) or 500.
+HTTPEmbeddings is the matching client; it has the embed_documents / embed_query interface of the
+LangChain embeddings, so it can be handed to BatchEmbedder or anywhere a VertexAIEmbeddings goes.
+FakeLLMServer answers POST /generate {"prompt": ...} with a well-formed quiz question (or a JSON array of
+them for batch prompts) under the same latency and failure settings; HTTPLLM is its LangChain LLM client.
+
+Run from the repository root to check BatchEmbedder against a flaky server:
+    python -m benchmarks.fake_servers --texts 2000 --failure-rate 0.2
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.language_models.llms import LLM
+
+def fake_vector(text, dim):
+    """
+    Deterministic unit vector for a text, so the same text always embeds the same way.
+    """
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+class _FakeServer:
+    """
+    Runs a ThreadingHTTPServer on a background thread; usable as a context manager.
+    """
+    def __init__(self, handler, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate(self):
+        """
+        Sleeps for the configured latency and returns False (after replying) if this request should fail.
+        """
+        fake = self.server.fake
+        fake.count("requests")
+        time.sleep(fake.latency)
+        roll = fake.rng.random()
+        if roll < fake.failure_rate:
+            fake.count("rate_limited")
+            self.send_json(429, {"error": "Quota exceeded"})
+            return False
+        if roll < fake.failure_rate + fake.error_rate:
+            fake.count("errors")
+            self.send_json(500, {"error": "Internal error"})
+            return False
+        return True
+
+class _EmbeddingHandler(_JSONHandler):
+    def do_POST(self):
+        if self.path != "/embed":
+            self.send_json(404, {"error": "Not found"})
+            return
+        payload = self.read_json()
+        if not self.simulate():
+            return
+        dim = self.server.fake.dim
+        self.send_json(200, {"embeddings": [fake_vector(text, dim) for text in payload.get("texts", [])]})
+
+class FakeEmbeddingServer(_FakeServer):
+    """
+    param dim: Dimension of the returned vectors (768 like textembedding-gecko).
+    param latency: Seconds every request takes.
+    param failure_rate: Fraction of requests answered with 429.
+    param error_rate: Fraction of requests answered with 500.
+    """
+    def __init__(self, dim=768, latency=0.05, failure_rate=0.0, error_rate=0.0, seed=0, **kwargs):
+        super().__init__(_EmbeddingHandler, **kwargs)
+        self.dim = dim
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+def post_json(url, payload, timeout=60):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def post_json_with_retries(url, payload, max_retries, backoff):
+    """
+    post_json, retrying 429 and 5xx answers with exponential backoff like the cloud SDK clients do.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return post_json(url, payload)
+        except urllib.error.HTTPError as e:
+            if attempt == max_retries or (e.code != 429 and e.code < 500):
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+class HTTPEmbeddings:
+    """
+    Client for FakeEmbeddingServer. HTTP errors from embed_documents surface as urllib.error.HTTPError,
+    whose .code of 429 is recognised as a rate-limit error by BatchEmbedder.
+
+    param query_retries: Retries for a failed embed_query. Queries do not go through BatchEmbedder, so
+                         without retries a flaky server fails retrievals outright.
+    """
+    def __init__(self, url, query_retries=0, backoff=0.05):
+        self.url = url.rstrip("/")
+        self.query_retries = query_retries
+        self.backoff = backoff
+
+    def embed_documents(self, texts):
+        return post_json(f"{self.url}/embed", {"texts": list(texts)})["embeddings"]
+
+    def embed_query(self, text):
+        response = post_json_with_retries(f"{self.url}/embed", {"texts": [text]}, self.query_retries, self.backoff)
+        return response["embeddings"][0]
+
+def fake_question(rng, topic):
+    """
+    A question in the schema QuizGenerator asks for. The random number in the question keeps generated
+    questions distinct, so the dedup index accepts them.
+    """
+    return {
+        "question": f"Which statement about {topic} holds at level {rng.randint(1, 10 ** 6)}?",
+        "choices": [{"key": key, "value": f"Statement {key} about {topic}"} for key in "ABCD"],
+        "answer": rng.choice("ABCD"),
+        "explanation": f"The context on {topic} states it directly.",
+    }
+
+class _LLMHandler(_JSONHandler):
+    def do_POST(self):
+        if self.path != "/generate":
+            self.send_json(404, {"error": "Not found"})
+            return
+        prompt = self.read_json().get("prompt", "")
+        if not self.simulate():
+            return
+        fake = self.server.fake
+        topic = re.search(r"on the topic: (.*)", prompt)
+        topic = topic.group(1).strip() if topic else "General Knowledge"
+        batch = re.search(r"create (\d+) distinct", prompt)
+        with fake.lock:  # random.Random is not safe to share between handler threads
+            if batch:
+                payload = [fake_question(fake.rng, topic) for _ in range(int(batch.group(1)))]
+            else:
+                payload = fake_question(fake.rng, topic)
+        self.send_json(200, {"text": json.dumps(payload)})
+
+class FakeLLMServer(_FakeServer):
+    """
+    param latency: Seconds every request takes.
+    param failure_rate: Fraction of requests answered with 429.
+    param error_rate: Fraction of requests answered with 500.
+    """
+    def __init__(self, latency=0.5, failure_rate=0.0, error_rate=0.0, seed=0, **kwargs):
+        super().__init__(_LLMHandler, **kwargs)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+class HTTPLLM(LLM):
+    """
+    LangChain LLM backed by FakeLLMServer, for QuizGenerator.llm. Failed requests are retried like the
+    Vertex AI client retries them; a request still failing after max_retries raises urllib.error.HTTPError.
+    """
+    url: str
+    max_retries: int = 3
+    backoff: float = 0.05
+
+    @property
+    def _llm_type(self):
+        return "fake-http"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        response = post_json_with_retries(
+            f"{self.url.rstrip('/')}/generate", {"prompt": prompt}, self.max_retries, self.backoff
+        )
+        return response["text"]
+
+if __name__ == "__main__":
+    from tasks.task_4.batch_embedder import BatchEmbedder
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=50.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    texts = [f"chunk number {i}" for i in range(args.texts)]
+    with FakeEmbeddingServer(dim=64, latency=args.latency, failure_rate=args.failure_rate, error_rate=args.error_rate) as server:
+        embedder = BatchEmbedder(
+            HTTPEmbeddings(server.url).embed_documents,
+            batch_size=args.batch_size,
+            max_workers=args.workers,
+            requests_per_second=args.rps,
+            max_retries=10,
+            backoff=0.05,
+        )
+        start = time.perf_counter()
+        vectors = embedder.embed(texts)
+        seconds = time.perf_counter() - start
+
+    in_order = all(vector == fake_vector(text, 64) for text, vector in zip(texts, vectors))
+    print(f"{len(vectors)} vectors in {seconds:.2f}s ({len(vectors) / seconds:.0f}/s), in order: {in_order}")
+    print(f"client: {embedder.stats}, final rate: {embedder.bucket.rate:.1f} req/s")
+    print(f"server: {server.stats}")
+    if not in_order or len(vectors) != len(texts):
+        raise SystemExit(1)
@@ -0,0 +1,117 @@
+"""
+Synthetic PDFs of any size, for benchmarks that need realistic input without shipping documents.
+
+make_pdf writes a minimal PDF (one Helvetica text object per page) that pypdf parses like a real one.
+synthetic_document fills it with seeded, topic-flavoured sentences in paragraphs, so chunking, retrieval
+and question generation see varied text and the same seed always gives the same bytes.
+
+Run from the repository root to write a sample:
+    python -m benchmarks.synthetic_pdf sample.pdf --pages 20
+"""
+import argparse
+import random
+
+TOPICS = {
+    "photosynthesis": ["chlorophyll", "light", "glucose", "chloroplast", "carbon dioxide", "oxygen", "leaf"],
+    "cell biology": ["mitochondria", "membrane", "ribosome", "nucleus", "protein", "enzyme", "cytoplasm"],
+    "plate tectonics": ["crust", "mantle", "earthquake", "subduction", "volcano", "fault", "continent"],
+    "thermodynamics": ["entropy", "heat", "temperature", "energy", "engine", "pressure", "equilibrium"],
+    "world history": ["empire", "treaty", "revolution", "trade", "dynasty", "war", "republic"],
+    "computer networks": ["packet", "router", "protocol", "latency", "bandwidth", "socket", "congestion"],
+}
+
+_VERBS = ["controls", "produces", "depends on", "transforms", "limits", "regulates", "releases", "absorbs"]
+_LINKS = ["because", "while", "unless", "after", "whenever", "so that"]
+
+LINE_WIDTH = 90     # Characters per line of text
+LINES_PER_PAGE = 60 # What fits on a letter page at 12pt leading
+
+def make_pdf(pages_text):
+    """
+    Returns the bytes of a PDF with one page per string in pages_text; newlines start new lines.
+    """
+    objects = []
+    count = len(pages_text)
+    # 1 catalog, 2 page tree, 3 font, then a (page, content stream) pair per page
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(count))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {count} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(pages_text):
+        lines = []
+        for line in text.split("\n"):
+            if not line:
+                lines.append("(\\n) Tj T*")  # An empty line extracts as nothing; a newline keeps the paragraph break
+                continue
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            lines.append(f"({escaped}) Tj T*")
+        stream = ("BT /F1 10 Tf 12 TL 50 780 Td " + " ".join(lines) + " ET").encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def _sentence(rng, topic):
+    words = TOPICS[topic]
+    first, second, third = rng.sample(words, 3)
+    return (f"In {topic}, the {first} {rng.choice(_VERBS)} the {second} {rng.choice(_LINKS)} "
+            f"the {third} reaches level {rng.randint(1, 999)}.")
+
+def _wrap(text, width):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+def synthetic_pages(num_pages, seed=0):
+    """
+    Returns the text of num_pages full pages: paragraphs of 3-6 sentences, each paragraph about one topic.
+    """
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+    pages = []
+    for _ in range(num_pages):
+        lines = []
+        while len(lines) < LINES_PER_PAGE:
+            topic = rng.choice(topics)
+            paragraph = " ".join(_sentence(rng, topic) for _ in range(rng.randint(3, 6)))
+            lines.extend(_wrap(paragraph, LINE_WIDTH))
+            lines.append("")  # Blank line between paragraphs
+        pages.append("\n".join(lines[:LINES_PER_PAGE]))
+    return pages
+
+def synthetic_document(num_pages, seed=0):
+    """
+    Returns the bytes of a num_pages page PDF of synthetic text.
+    """
+    return make_pdf(synthetic_pages(num_pages, seed))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Where to write the PDF")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.path, "wb") as f:
+        f.write(synthetic_document(args.pages, args.seed))
+    print(f"Wrote {args.pages} pages to {args.path}")
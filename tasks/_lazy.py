@@ -0,0 +1,33 @@
+import importlib
+import threading
+
+class LazyModule:
+    """
+    Stands in for a module that is only imported when one of its attributes is first used, so
+    `st = lazy_import("streamlit")` at the top of a file keeps `st.progress(...)` working without making
+    every importer of that file pay for Streamlit.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+def lazy_import(name):
+    """
+    Returns a LazyModule for name.
+    """
+    return LazyModule(name)
@@ -0,0 +1,207 @@
+"""
+Headless quiz generation for whole directories of PDFs.
+
+Every PDF is processed in a worker process: DocumentProcessor parses it, ChromaCollectionCreator indexes it
+(in the in-process numpy store, so workers share nothing) and QuizGenerator writes a quiz for every topic.
+Each (document, topic) result is appended to a JSONL file as soon as its document is done. A rerun with the
+same output file skips the (document hash, topic) pairs already written with a complete quiz, so an
+interrupted run resumes where it stopped, and failed or short quizzes are retried (their new record is
+appended; the last record with "complete": true is the one to use).
+
+Usage, from the repository root:
+    python -m tasks.batch_cli course_pdfs/ topics.txt --output quizzes.jsonl --workers 8 --num-questions 10
+
+topics.txt holds one topic per line; blank lines and lines starting with # are ignored.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tasks.task_3.page_cache import content_hash
+
+def read_topics(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def find_pdfs(directory):
+    """
+    Returns the PDFs under directory (recursively), in a stable order.
+    """
+    paths = []
+    for root, _, names in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in names if name.lower().endswith(".pdf"))
+    return sorted(paths)
+
+def completed_pairs(output_path):
+    """
+    Returns the (document hash, topic) pairs already written with a complete quiz.
+    A line cut short by an interruption is ignored, so its pair is generated again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("complete"):
+                done.add((record["doc_hash"], record["topic"]))
+    return done
+
+def load_factory(path):
+    """
+    Resolves "package.module:function" to the function.
+    """
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+def _init_worker(verbose=False):
+    # Streamlit calls inside the pipeline are no-ops without a running app; keep their warnings out of the log
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.disable(logging.WARNING)
+    # The pipeline prints a line per question; only the progress lines on stderr belong in the log
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")
+
+def process_document(path, doc_hash, topics, options):
+    """
+    Runs the whole pipeline for one PDF and returns one record per topic. Runs inside a worker process.
+    """
+    from tasks.task_3.task_3 import DocumentProcessor
+    from tasks.task_4.task_4 import EmbeddingClient
+    from tasks.task_5.task_5 import ChromaCollectionCreator
+    from tasks.task_8.task_8 import QuizGenerator
+
+    started = time.perf_counter()
+    name = os.path.basename(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    processor = DocumentProcessor()
+    processor.process_files([(name, data)])
+    embed_client = EmbeddingClient(
+        options["embedding_model"], options["project"], options["location"],
+        batch_size=32, backend=options["embedding_backend"],
+    )
+    creator = ChromaCollectionCreator(processor, embed_client, store="numpy")
+    creator.create_chroma_collection()
+    indexed = time.perf_counter()
+
+    records = []
+    for topic in topics:
+        topic_started = time.perf_counter()
+        record = {"document": path, "doc_hash": doc_hash, "topic": topic, "questions": [], "error": None,
+                  "complete": False}
+        try:
+            generator = QuizGenerator(topic, options["num_questions"], creator, context_strategy="round_robin")
+            if options["llm_factory"]:
+                generator.llm = load_factory(options["llm_factory"])()
+            record["questions"] = generator.generate_quiz(
+                max_concurrency=options["max_concurrency"], batch=options["batch"], deadline=options["deadline"]
+            )
+            record["stats"] = {key: generator.stats[key] for key in ("attempts", "failed_attempts", "accepted", "time_to_quiz")}
+            # A quiz cut short by the attempt budget or the deadline is retried on the next run
+            record["complete"] = len(record["questions"]) >= options["num_questions"]
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.perf_counter() - topic_started, 3)
+        records.append(record)
+    for record in records:
+        record["pages"] = len(processor.pages)
+        record["index_seconds"] = round(indexed - started, 3)
+    return records
+
+def run(args):
+    topics = read_topics(args.topics)
+    done = completed_pairs(args.output)
+    jobs = []
+    for path in find_pdfs(args.pdf_dir):
+        with open(path, "rb") as f:
+            doc_hash = content_hash(f.read())
+        todo = [topic for topic in topics if (doc_hash, topic) not in done]
+        if todo:
+            jobs.append((path, doc_hash, todo))
+    skipped = len(done)
+    print(f"{len(jobs)} documents to process, {skipped} (document, topic) pairs already done.", file=sys.stderr)
+
+    options = {
+        "embedding_model": args.embedding_model,
+        "project": args.project,
+        "location": args.location,
+        "embedding_backend": args.embedding_backend,
+        "num_questions": args.num_questions,
+        "max_concurrency": args.max_concurrency,
+        "batch": args.batch,
+        "deadline": args.deadline,
+        "llm_factory": args.llm_factory,
+    }
+    # A run killed mid-write leaves a partial last line; start on a fresh line so the next record stays valid
+    if os.path.exists(args.output) and os.path.getsize(args.output) > 0:
+        with open(args.output, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    started = time.perf_counter()
+    questions = failures = incomplete = 0
+    with open(args.output, "a", encoding="utf-8") as output, \
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.verbose,)) as executor:
+        futures = {executor.submit(process_document, path, doc_hash, todo, options): path for path, doc_hash, todo in jobs}
+        try:
+            for finished, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                try:
+                    records = future.result()
+                except Exception as e:
+                    # The document itself failed (e.g. an unreadable PDF); it is retried on the next run
+                    failures += 1
+                    print(f"[{finished}/{len(jobs)}] {path}: failed: {e}", file=sys.stderr)
+                    continue
+                for record in records:
+                    output.write(json.dumps(record) + "\n")
+                    questions += len(record["questions"])
+                    failures += bool(record["error"])
+                    incomplete += not record["error"] and not record["complete"]
+                output.flush()  # Everything written survives an interruption
+                print(f"[{finished}/{len(jobs)}] {path}: {sum(len(r['questions']) for r in records)} questions", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("Interrupted; rerun the same command to resume.", file=sys.stderr)
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    elapsed = time.perf_counter() - started
+    print(
+        f"Done in {elapsed:.1f}s: {questions} questions ({questions / elapsed if elapsed else 0:.2f}/s), "
+        f"{failures} failures, {incomplete} short quizzes.",
+        file=sys.stderr,
+    )
+    return 1 if failures or incomplete else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf_dir", help="Directory searched recursively for PDFs")
+    parser.add_argument("topics", help="Text file with one topic per line")
+    parser.add_argument("--output", default="quizzes.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--num-questions", type=int, default=5, help="Questions per (document, topic), at most 10")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="LLM requests in flight per worker")
+    parser.add_argument("--batch", action="store_true", help="Ask for all questions of a quiz in one LLM call")
+    parser.add_argument("--deadline", type=float, default=None, help="Seconds allowed per quiz")
+    parser.add_argument("--embedding-backend", default="vertex", choices=["vertex", "hashing"])
+    parser.add_argument("--embedding-model", default="textembedding-gecko@003")
+    parser.add_argument("--project", default="quizify-432223")
+    parser.add_argument("--location", default="us-central1")
+    parser.add_argument("--llm-factory", default=None,
+                        help="module:function returning a LangChain LLM to use instead of Vertex AI")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args(argv)
+    if not 1 <= args.num_questions <= 10:
+        parser.error("--num-questions must be between 1 and 10.")
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
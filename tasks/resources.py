@@ -0,0 +1,101 @@
+import threading
+import time
+
+class ResourceRegistry:
+    """
+    Process-wide home for long-lived, expensive objects (model clients, built collections) shared by every
+    Streamlit session and rerun. get_or_create builds a resource once per key; concurrent callers asking for
+    the same key wait for that single construction instead of building their own. Resources not used for
+    idle_ttl seconds are dropped (and closed, if they have a close method) on the next registry access.
+
+    param idle_ttl: Seconds a resource may go unused before it is evicted (None never evicts).
+    """
+    def __init__(self, idle_ttl=1800):
+        self.idle_ttl = idle_ttl
+        self.lock = threading.Lock()
+        self.entries = {}      # key -> [resource, last_used, construction seconds]
+        self.key_locks = {}    # key -> lock serializing construction (and callers' own setup, see key_lock)
+        self.counters = {"hits": 0, "creations": 0, "evictions": 0, "construction_seconds_saved": 0.0}
+
+    def key_lock(self, key):
+        """
+        Returns the lock for key, for callers that must finish setting a shared resource up exactly once
+        (e.g. building a collection) while other sessions wait.
+        """
+        with self.lock:
+            return self.key_locks.setdefault(key, threading.RLock())
+
+    def get(self, key):
+        """
+        Returns the resource for key, or None if it was never built or has been evicted.
+        """
+        self.evict_idle()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry[1] = time.monotonic()
+            self.counters["hits"] += 1
+            return entry[0]
+
+    def get_or_create(self, key, factory):
+        """
+        Returns the resource for key, calling factory() to build it if it does not exist yet.
+        """
+        self.evict_idle()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self.counters["hits"] += 1
+                self.counters["construction_seconds_saved"] += entry[2]
+                return entry[0]
+        with self.key_lock(key):
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:  # Built by another caller while we waited
+                    entry[1] = time.monotonic()
+                    self.counters["hits"] += 1
+                    self.counters["construction_seconds_saved"] += entry[2]
+                    return entry[0]
+            start = time.monotonic()
+            resource = factory()
+            now = time.monotonic()
+            with self.lock:
+                self.entries[key] = [resource, now, now - start]
+                self.counters["creations"] += 1
+            return resource
+
+    def evict_idle(self):
+        """
+        Drops resources unused for longer than idle_ttl. Returns the number evicted.
+        """
+        if self.idle_ttl is None:
+            return 0
+        cutoff = time.monotonic() - self.idle_ttl
+        with self.lock:
+            stale = [key for key, entry in self.entries.items() if entry[1] < cutoff]
+            resources = [self.entries.pop(key)[0] for key in stale]
+            for key in stale:
+                self.key_locks.pop(key, None)
+            self.counters["evictions"] += len(stale)
+        for resource in resources:
+            close = getattr(resource, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    print(f"Failed to close evicted resource: {e}")
+        return len(stale)
+
+    def stats(self):
+        with self.lock:
+            return {"resources": len(self.entries), **self.counters}
+
+_registry = ResourceRegistry()
+
+def get_registry():
+    """
+    Returns the registry shared by the whole process.
+    """
+    return _registry
@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from tasks.task_8.dedup_index import QuestionDedupIndex
+from tasks.task_9.question_store import normalize_topic
+
+class PregenerationPool:
+    """
+    Background workers that generate questions ahead of demand and put them in a QuestionStore.
+    Every (corpus, topic) pair a quiz is served for is remembered (the most recent max_recent_pairs of them)
+    together with a factory for its QuizGenerator. A pair is queued whenever it has fewer than target
+    unserved questions; a worker then generates up to batch_size new questions for it and queues it again
+    until the target is reached. Quizzes are then mostly read from the store instead of waiting on the LLM.
+
+    param store: The QuestionStore to fill.
+    param num_workers: Number of worker threads.
+    param target: Unserved questions to keep ready per pair.
+    param batch_size: Questions per generation job (QuizGenerator allows at most 10).
+    param max_recent_pairs: Number of recently used pairs kept warm.
+    """
+    def __init__(self, store, num_workers=2, target=10, batch_size=5, max_recent_pairs=20):
+        self.store = store
+        self.target = target
+        self.batch_size = min(batch_size, 10)
+        self.max_recent_pairs = max_recent_pairs
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.recent = OrderedDict()  # (corpus, topic) -> (topic as typed, generator factory)
+        self.queued = set()          # Pairs waiting in the queue or being worked on
+        self.started_at = time.monotonic()
+        self.counters = {"jobs_done": 0, "jobs_failed": 0, "questions_generated": 0, "busy_workers": 0, "busy_seconds": 0.0}
+        self.stopped = threading.Event()
+        self.workers = [
+            threading.Thread(target=self._work, name=f"quiz-pregeneration-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def touch(self, corpus_hash, topic, generator_factory):
+        """
+        Records that a quiz was served for a pair and queues it if its ready questions run low.
+        generator_factory(num_questions, dedup_index) must return a QuizGenerator for the pair.
+        """
+        key = (corpus_hash, normalize_topic(topic))
+        with self.lock:
+            self.recent[key] = (topic, generator_factory)
+            self.recent.move_to_end(key)
+            while len(self.recent) > self.max_recent_pairs:
+                self.recent.popitem(last=False)
+        self._enqueue_if_low(key)
+
+    def _enqueue_if_low(self, key):
+        if self.store.count(*key, unserved_only=True) >= self.target:
+            return
+        with self.lock:
+            if key in self.queued or key not in self.recent:
+                return
+            self.queued.add(key)
+        self.jobs.put(key)
+
+    def _work(self):
+        while not self.stopped.is_set():
+            try:
+                key = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self.lock:
+                topic, factory = self.recent.get(key, (None, None))
+                self.counters["busy_workers"] += 1
+            start = time.monotonic()
+            added = 0
+            try:
+                if factory is not None:
+                    added = self._generate(key, topic, factory)
+            except Exception as e:
+                print(f"Pre-generation for topic {topic!r} failed: {e}")
+                with self.lock:
+                    self.counters["jobs_failed"] += 1
+            finally:
+                with self.lock:
+                    self.counters["busy_workers"] -= 1
+                    self.counters["busy_seconds"] += time.monotonic() - start
+                    self.queued.discard(key)
+                self.jobs.task_done()
+            if added:
+                self._enqueue_if_low(key)  # Continue until the target is reached
+
+    def _generate(self, key, topic, factory):
+        """
+        Generates one batch of questions for a pair and returns the number stored.
+        """
+        corpus_hash = key[0]
+        missing = self.target - self.store.count(*key, unserved_only=True)
+        if missing <= 0:
+            return 0
+        dedup_index = QuestionDedupIndex()
+        for text in self.store.question_texts(corpus_hash, topic):
+            dedup_index.add(text)
+        generator = factory(min(missing, self.batch_size), dedup_index)
+        added = self.store.add_many(corpus_hash, topic, generator.generate_quiz())
+        with self.lock:
+            self.counters["jobs_done"] += 1
+            self.counters["questions_generated"] += added
+        return added
+
+    def stats(self):
+        """
+        Returns queue depth, worker utilization and throughput since the pool started.
+        """
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            return {
+                "queue_depth": self.jobs.qsize(),
+                "workers": len(self.workers),
+                **self.counters,
+                "questions_per_second": self.counters["questions_generated"] / elapsed if elapsed else 0.0,
+                "questions_per_busy_second": (
+                    self.counters["questions_generated"] / self.counters["busy_seconds"]
+                    if self.counters["busy_seconds"] else 0.0
+                ),
+                "warm_pairs": len(self.recent),
+            }
+
+    def shutdown(self, wait=True):
+        """
+        Stops the workers after their current job.
+        """
+        self.stopped.set()
+        if wait:
+            for worker in self.workers:
+                worker.join()
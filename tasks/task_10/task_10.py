@@ -2,61 +2,215 @@ import streamlit as st
 import os
 import sys
 import json
+import threading
+import time
 sys.path.append(os.path.abspath('../../'))
 from tasks.task_3.task_3 import DocumentProcessor
+from tasks.task_3.page_cache import PageCache
 from tasks.task_4.task_4 import EmbeddingClient
-from tasks.task_5.task_5 import ChromaCollectionCreator
+from tasks.task_4.embedding_cache import DEFAULT_CACHE_DIRECTORY
+from tasks.task_5.task_5 import ChromaCollectionCreator, DEFAULT_PERSIST_DIRECTORY
 from tasks.task_8.task_8 import QuizGenerator
+from tasks.task_8.llm_cache import LLMResponseCache
+from tasks.task_8.dedup_index import QuestionDedupIndex
 from tasks.task_9.task_9 import QuizManager
+from tasks.task_9.question_store import QuestionStore
+from tasks.task_10.pregenerator import PregenerationPool
+from tasks.resources import get_registry
+
+@st.cache_resource
+def get_page_cache():
+    # One cache per server process, so reruns and other sessions reuse parsed PDFs
+    return PageCache()
+
+@st.cache_resource
+def get_llm_cache():
+    # Regenerating a quiz for the same document and topic replays cached LLM responses
+    return LLMResponseCache()
+
+@st.cache_resource
+def get_question_store():
+    # Questions outlive the session; a known (corpus, topic) pair is served without calling the LLM
+    return QuestionStore()
+
+@st.cache_resource
+def get_pregeneration_pool():
+    # Keeps recently used (corpus, topic) pairs stocked with unserved questions in the background
+    return PregenerationPool(get_question_store())
+
+def make_generator_factory(topic, corpus):
+    """
+    Returns the QuizGenerator factory the pre-generation pool uses for a (corpus, topic) pair.
+    The collection is looked up in the registry when a job runs, not captured here, because the registry
+    closes and drops collections that sit idle; a job for an evicted collection fails instead of using it.
+    """
+    def factory(num_questions, dedup_index):
+        chroma_creator = get_registry().get(("collection", corpus))
+        if chroma_creator is None or chroma_creator.db is None:
+            raise LookupError(f"the collection for corpus {corpus[:16]} is no longer loaded")
+        return QuizGenerator(
+            topic, num_questions, chroma_creator, context_strategy="mmr",
+            dedup_index=dedup_index, llm_cache=get_llm_cache(),
+        )
+    return factory
+
+def start_generation(generator, store, corpus, topic, question_ids, status, on_done=None):
+    """
+    Generates the quiz in a background thread. Every accepted question is stored and its ID appended to
+    question_ids (the list the quiz screen reads), so the quiz can be shown before it is complete.
+    The thread cannot use st.session_state, so it reports through status (a dict kept in the session state):
+    "done" becomes True when generation ends, and "error" holds the message of an exception that stopped it.
+    on_done() is called in the thread once generation has ended, whatever the outcome.
+    """
+    def on_question(question):
+        question_id = store.add(corpus, topic, question, served=True)
+        if question_id is not None:
+            question_ids.append(question_id)
+
+    def run():
+        try:
+            generator.generate_quiz(max_concurrency=4, batch=True, on_question=on_question)
+        except Exception as e:
+            print(f"Quiz generation failed: {e}")
+            status["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            status["done"] = True
+            if on_done is not None:
+                on_done()
+
+    thread = threading.Thread(target=run, name="quiz-generation", daemon=True)
+    thread.start()
+    return thread
 
 if __name__ == "__main__":
     
     embed_config = {
         "model_name": "textembedding-gecko@003",
         "project": "quizify-432223",
-        "location": "us-central1"
+        "location": "us-central1",
+        # "hashing" runs fully offline, e.g. for load tests
+        "backend": os.getenv("QUIZIFY_EMBEDDING_BACKEND", "vertex"),
     }
     
     # Add Session State
-    if 'question_bank' not in st.session_state or len(st.session_state['question_bank']) == 0:
-        st.session_state['question_bank'] = []
+    if 'question_ids' not in st.session_state or len(st.session_state['question_ids']) == 0:
+        st.session_state['question_ids'] = []
         screen = st.empty()
         with screen.container():
             st.header("Quiz Builder")
+            pool_stats = get_pregeneration_pool().stats()
+            st.caption(
+                f"Pre-generation: {pool_stats['queue_depth']} queued, "
+                f"{pool_stats['busy_workers']}/{pool_stats['workers']} workers busy, "
+                f"{pool_stats['questions_generated']} questions ready-made "
+                f"({pool_stats['questions_per_busy_second']:.2f} questions/s per busy worker)"
+            )
             
             # Create a new st.form flow control for Data Ingestion
             with st.form("Load Data to Chroma"):
                 st.write("Select PDFs for Ingestion, the topic for the quiz, and click Generate!")
                 
-                processor = DocumentProcessor()
+                processor = DocumentProcessor(parallel=True, stream=True, cache=get_page_cache())
                 processor.ingest_documents()
-                embed_client = EmbeddingClient(**embed_config) 
-                chroma_creator = ChromaCollectionCreator(processor, embed_client)
+                # Clients and built collections are shared by every session and rerun (see ResourceRegistry)
+                registry = get_registry()
+                embed_client = registry.get_or_create(
+                    ("embedding-client", tuple(sorted(embed_config.items()))),
+                    lambda: EmbeddingClient(**embed_config, batch_size=32, cache_dir=DEFAULT_CACHE_DIRECTORY),
+                )
+                # One persistent collection per corpus, so re-uploading the same PDFs costs no embedding calls
+                corpus = processor.corpus_hash()
+                collection_key = ("collection", corpus)
+                chroma_creator = registry.get_or_create(
+                    collection_key,
+                    lambda: ChromaCollectionCreator(
+                        processor, embed_client,
+                        persist_directory=DEFAULT_PERSIST_DIRECTORY,
+                        collection_name=f"corpus-{corpus[:16]}",
+                    ),
+                )
                 
                 topic_input = st.text_input("Enter Your Quiz Topic: ", placeholder="Enter here")
                 questions = st.slider("Number of Questions", min_value=1, max_value=10, value=1)
+                fresh = st.checkbox("Generate fresh questions", help="Skip previously generated answers for this document and topic")
                     
                 submitted = st.form_submit_button("Submit")
                 
                 if submitted:
-                    chroma_creator.create_chroma_collection()
+                    submitted_at = time.monotonic()
+                    # Another session may be building this corpus right now; wait for it instead of repeating it
+                    with registry.key_lock(collection_key):
+                        if chroma_creator.db is None and not chroma_creator.open_chroma_collection():
+                            chroma_creator.create_chroma_collection()
                         
-                    if len(processor.pages) > 0:
+                    if processor.has_documents():
                         st.write(f"Generating {questions} questions for topic: {topic_input}")
 
-                    generator = QuizGenerator(topic_input, questions, chroma_creator)
-                    question_bank = generator.generate_quiz()
+                    store = get_question_store()
+                    pool = get_pregeneration_pool()
+                    generator_factory = make_generator_factory(topic_input, corpus)
+                    generation = {"done": True, "error": None}
+                    stored = store.count(corpus, topic_input)
+                    if not fresh and stored >= questions:
+                        # A known (corpus, topic) pair: the whole quiz comes from the store
+                        question_ids = store.take(corpus, topic_input, questions)
+                        # Refill what this quiz consumed before the next one asks for it
+                        pool.touch(corpus, topic_input, generator_factory)
+                    else:
+                        # Start with what is stored and generate the rest in the background; the quiz is shown
+                        # as soon as the first question exists and the others are appended as they arrive
+                        question_ids = [] if fresh else store.take(corpus, topic_input, stored)
+                        dedup_index = QuestionDedupIndex()
+                        for text in store.question_texts(corpus, topic_input):
+                            dedup_index.add(text)
+                        generator = QuizGenerator(
+                            topic_input, questions - len(question_ids), chroma_creator,
+                            context_strategy="mmr", dedup_index=dedup_index,
+                            llm_cache=get_llm_cache(), bypass_cache=fresh,
+                        )
+                        generation = {"done": False, "error": None}
+                        # The pool refills the pair only once this generation is over, so the two never race
+                        # for the same questions
+                        thread = start_generation(
+                            generator, store, corpus, topic_input, question_ids, generation,
+                            on_done=lambda: pool.touch(corpus, topic_input, generator_factory),
+                        )
+                        while not question_ids and thread.is_alive():
+                            time.sleep(0.05)
 
-                    st.session_state['question_bank'] = question_bank
-                    st.session_state['display_quiz'] = True
-                    st.session_state['question_index'] = 0
-                    st.experimental_rerun()                             # force rerun to let the app shows up the quiz
+                    if not question_ids:
+                        # Nothing to show: say why instead of silently rendering the builder again
+                        reason = generation["error"] or "the model did not return any valid, new question"
+                        st.error(f"No questions could be generated: {reason}", icon="🚨")
+                    else:
+                        st.session_state['question_ids'] = question_ids
+                        st.session_state['generation'] = generation
+                        st.session_state['quiz_size'] = questions
+                        st.session_state['time_to_first_question'] = time.monotonic() - submitted_at
+                        st.session_state['display_quiz'] = True
+                        st.session_state['question_index'] = 0
+                        st.experimental_rerun()                             # force rerun to let the app shows up the quiz
 
     elif st.session_state["display_quiz"]:       
         st.empty()
         with st.container():
             st.header("Generated Quiz Question: ")
-            quiz_manager = QuizManager(st.session_state['question_bank'])
+            quiz_manager = QuizManager.from_store(get_question_store(), st.session_state['question_ids'])
+            generation = st.session_state.get('generation', {"done": True, "error": None})
+            if quiz_manager.total_questions < st.session_state['quiz_size']:
+                if not generation["done"]:
+                    st.caption(
+                        f"{quiz_manager.total_questions} of {st.session_state['quiz_size']} questions ready, "
+                        f"the rest are still being generated. First question after "
+                        f"{st.session_state['time_to_first_question']:.1f}s."
+                    )
+                else:
+                    # Generation ended short: the attempt budget was spent or the model failed
+                    reason = f": {generation['error']}" if generation["error"] else "."
+                    st.warning(
+                        f"Only {quiz_manager.total_questions} of {st.session_state['quiz_size']} questions "
+                        f"could be generated{reason}"
+                    )
             
             # Format the question and display it
             with st.form("MCQ"):
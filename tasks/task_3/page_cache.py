@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from langchain_core.documents import Document
+
+def content_hash(data):
+    """
+    Returns the SHA-256 hex digest of an upload's bytes, the key used by PageCache.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+class PageCache:
+    """
+    Content-addressed cache of parsed PDF pages, keyed by the SHA-256 of the upload bytes.
+    Lookups go to an in-process LRU first and then to a directory of JSON files, so a PDF that was
+    parsed once is never parsed again, across Streamlit reruns and across server restarts.
+    Both tiers are bounded by size and evict the least recently used entries first.
+
+    param directory: Where the on-disk tier lives. None disables the disk tier.
+    param max_memory_bytes: Approximate budget for page text held in memory.
+    param max_disk_bytes: Budget for the files in the disk tier.
+    """
+    def __init__(self, directory=os.path.join(tempfile.gettempdir(), "quizify_page_cache"),
+                 max_memory_bytes=64 * 1024 * 1024, max_disk_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (size, [(page_content, metadata), ...])
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key, source=None):
+        """
+        Returns the cached pages for key as fresh Documents, or None on a miss.
+        param source: If given, replaces the "source" metadata so a re-upload under a new name is labelled correctly.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._to_documents(entry[1], source)
+
+        records = self._read_disk(key)
+        with self._lock:
+            if records is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, records)
+        return self._to_documents(records, source)
+
+    def put(self, key, pages):
+        """
+        Stores the parsed pages for key in both tiers.
+        """
+        records = [(page.page_content, dict(page.metadata)) for page in pages]
+        with self._lock:
+            self._remember(key, records)
+        self._write_disk(key, records)
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the current size of each tier.
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    @staticmethod
+    def _to_documents(records, source):
+        documents = []
+        for page_content, metadata in records:
+            metadata = dict(metadata)
+            if source is not None:
+                metadata["source"] = source
+            documents.append(Document(page_content=page_content, metadata=metadata))
+        return documents
+
+    def _remember(self, key, records):
+        # Caller holds self._lock
+        size = sum(len(page_content) for page_content, _ in records)
+        if size > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[0]
+        self._memory[key] = (size, records)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (evicted_size, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            os.utime(path)  # Mark as recently used for eviction
+        except (OSError, ValueError):
+            return None
+        return [(page_content, metadata) for page_content, metadata in records]
+
+    def _write_disk(self, key, records):
+        if not self.directory:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            os.replace(temp_path, path)  # Atomic, so concurrent readers never see half a file
+        except OSError as e:
+            print(f"Failed to write page cache entry: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+                total -= size
+            except OSError:
+                pass
@@ -1,18 +1,51 @@
-import streamlit as st
-from langchain_community.document_loaders import PyPDFLoader
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import deque
+import hashlib
 import os
-import tempfile
-import uuid
+import sys
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath('../../'))
+from tasks._lazy import lazy_import
+from tasks.task_3.page_cache import PageCache, content_hash
+
+st = lazy_import("streamlit")  # Only the UI methods need Streamlit
+
+def parse_pdf_bytes(file_name, data):
+    """
+    Parses the raw bytes of an uploaded PDF into one Document per page, straight from memory.
+    Module level so it can be pickled and run inside a worker process.
+    param file_name: The original file name, recorded as the "source" of every page.
+    param data: The binary content of the PDF.
+    return: A list of Documents in page order, the same shape PyPDFLoader produces.
+    """
+    from langchain_community.document_loaders.blob_loaders import Blob
+    from langchain_community.document_loaders.parsers.pdf import PyPDFParser
+
+    blob = Blob.from_data(data, path=file_name, mime_type="application/pdf")
+    return list(PyPDFParser().lazy_parse(blob))
 
 class DocumentProcessor:
     """
     This class encapsulates the functionality for processing uploaded PDF documents using Streamlit
-    and Langchain's PyPDFLoader. It provides a method to render a file uploader widget, process the
+    and Langchain's PyPDF parser. It provides a method to render a file uploader widget, process the
     uploaded PDF files, extract their pages, and display the total number of pages extracted.
+
+    param parallel: If True, PDFs are parsed across a process pool instead of one after another.
+    param max_workers: Size of the process pool in parallel mode (defaults to the number of cores).
+    param cache: An optional PageCache; uploads whose bytes were parsed before skip the parser entirely.
+    param stream: If True, uploads are only kept as bytes and their pages are produced lazily by iter_pages,
+                  so downstream stages can start before every PDF is parsed.
     """
-    def __init__(self):
+    def __init__(self, parallel=False, max_workers=None, stream=False, cache=None):
         self.pages = []  # List to keep track of pages from all documents
-    
+        self.files = []  # (file_name, bytes) of the uploads, only kept in stream mode
+        self.file_progress = []  # (file_name, page count) of every queued upload iter_pages has reached
+        self.file_hashes = []  # SHA-256 of every upload, identifies the corpus
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.stream = stream
+        self.cache = cache
+
     def ingest_documents(self):
         """
         Renders a file uploader in a Streamlit app, processes uploaded PDF files,
@@ -20,36 +53,145 @@ class DocumentProcessor:
         """
         #Create on streamlit, a file uploader widget to allow users to upload PDF files.
         uploaded_files = st.file_uploader("Upload a PDF file", type="pdf", accept_multiple_files=True, help="You can upload multiple")
-        
+
         if uploaded_files is not None:
-            for uploaded_file in uploaded_files:
-                # Generate a unique identifier to append to the file's original name
-                unique_id = uuid.uuid4().hex #hexadecimal string
-                original_name, file_extension = os.path.splitext(uploaded_file.name) #take out pdf
-                temp_file_name = f"{original_name}_{unique_id}{file_extension}" #example_123.pdf
-                temp_file_path = os.path.join(tempfile.gettempdir(), temp_file_name)
-
-                # Write the uploaded PDF to a temporary file
-                with open(temp_file_path, 'wb') as f:
-                    f.write(uploaded_file.getvalue()) #writes the binary content into the temp file-path
-
-                # Use PyPDFLoader to load uploaded files and load them into "pages"
-                loader = PyPDFLoader(temp_file_path)
-                pages = loader.load()
-                num_pages = len(pages)
-                st.write(f"The PDF contains {num_pages} pages.")
-                
-                # Append pages to pages list (locally)
-                for p in pages: 
-                    self.pages.append(p)
-
-                # Clean up by deleting the temporary file.
-                os.unlink(temp_file_path)
-            
+            files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+            if self.stream:
+                self.file_hashes.extend(content_hash(data) for _, data in files)
+                # Parsing is deferred to iter_pages so it overlaps with chunking and embedding
+                self.files.extend(files)
+                st.write(f"Total PDFs queued: {len(self.files)}")
+                return
+            self.process_files(files)
+
             # Display the total number of pages processed.
             st.write(f"Total pages processed: {len(self.pages)}")
-            
+
+    def has_documents(self):
+        """
+        Returns True if there is anything to build a collection from, parsed or still queued.
+        """
+        return len(self.pages) > 0 or len(self.files) > 0
+
+    def corpus_hash(self):
+        """
+        Returns a SHA-256 identifying the set of uploaded files by content, independent of upload order and file names.
+        """
+        digest = hashlib.sha256()
+        for file_hash in sorted(self.file_hashes):
+            digest.update(file_hash.encode("ascii"))
+        return digest.hexdigest()
+
+    def iter_pages(self):
+        """
+        Yields every page, already parsed ones first and then the queued uploads in upload order.
+        In parallel mode at most 2 * max_workers files are parsed ahead of the consumer, which keeps
+        memory bounded when the consumer (embedding) is slower than parsing.
+        Does not touch Streamlit, so it is safe to drive from a background thread; the consumer reports
+        progress instead, from file_progress, which gets (file_name, page count) as each queued file is reached.
+        """
+        self.file_progress = []
+        yield from self.pages
+
+        if not (self.parallel and len(self.files) > 1):
+            for name, data in self.files:
+                key, pages = self._lookup(name, data)
+                if pages is None:
+                    pages = parse_pdf_bytes(name, data)
+                    self._store(key, pages)
+                self.file_progress.append((name, len(pages)))
+                yield from pages
+            return
+
+        lookahead = 2 * (self.max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            # Each entry is (file name, cache key, cached pages or a future parsing them)
+            pending = deque()
+            files = iter(self.files)
+
+            def schedule(name, data):
+                key, pages = self._lookup(name, data)
+                pending.append((name, key, pages if pages is not None else executor.submit(parse_pdf_bytes, name, data)))
+
+            for name, data in files:
+                schedule(name, data)
+                if len(pending) >= lookahead:
+                    break
+            while pending:
+                name, key, pages = pending.popleft()
+                if not isinstance(pages, list):
+                    pages = pages.result()
+                    self._store(key, pages)
+                next_file = next(files, None)
+                if next_file is not None:
+                    schedule(*next_file)
+                self.file_progress.append((name, len(pages)))
+                yield from pages
+
+    def _lookup(self, name, data):
+        """
+        Returns (cache key, cached pages or None). The key is None when there is no cache.
+        """
+        if self.cache is None:
+            return None, None
+        key = content_hash(data)
+        return key, self.cache.get(key, source=name)
+
+    def _store(self, key, pages):
+        if self.cache is not None:
+            self.cache.put(key, pages)
+
+    def process_files(self, files):
+        """
+        Parses (file_name, bytes) pairs and appends their pages to self.pages.
+        Pages are always appended in upload order, whichever file finishes parsing first.
+        param files: A list of (file_name, bytes) tuples.
+        """
+        if not files:
+            return
+        self.file_hashes.extend(content_hash(data) for _, data in files)
+
+        progress = st.progress(0.0, text="Parsing PDFs...")
+        results = [None] * len(files)
+        keys = [None] * len(files)
+        done = 0
+
+        def report(index):
+            nonlocal done
+            done += 1
+            file_name = files[index][0]
+            st.write(f"{file_name}: the PDF contains {len(results[index])} pages.")
+            progress.progress(done / len(files), text=f"Parsed {done} of {len(files)} PDFs")
+
+        # Files already seen (by content) come straight from the cache
+        to_parse = []
+        for i, (name, data) in enumerate(files):
+            keys[i], results[i] = self._lookup(name, data)
+            if results[i] is None:
+                to_parse.append(i)
+            else:
+                report(i)
+
+        if self.parallel and len(to_parse) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(parse_pdf_bytes, *files[i]): i for i in to_parse}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    results[i] = future.result()
+                    self._store(keys[i], results[i])
+                    report(i)
+        else:
+            for i in to_parse:
+                results[i] = parse_pdf_bytes(*files[i])
+                self._store(keys[i], results[i])
+                report(i)
+
+        # Append pages to pages list in upload order so runs are reproducible
+        for pages in results:
+            self.pages.extend(pages)
+
 #testing
 if __name__ == "__main__":
-    processor = DocumentProcessor()
+    processor = DocumentProcessor(parallel=True, cache=PageCache())
     processor.ingest_documents()
+    st.write(processor.cache.stats())
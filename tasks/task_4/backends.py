@@ -0,0 +1,124 @@
+import os
+import re
+import zlib
+import numpy as np
+
+class EmbeddingBackend:
+    """
+    Interface every embedding backend of EmbeddingClient implements (the LangChain Embeddings interface).
+    """
+    def embed_documents(self, texts):
+        """
+        Returns one vector (list of floats) per text.
+        """
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        """
+        Returns the vector (list of floats) for a search query.
+        """
+        raise NotImplementedError
+
+    def embed_queries(self, texts):
+        """
+        Returns one query vector per text. Backends override this to embed all queries in one call.
+        """
+        return [self.embed_query(text) for text in texts]
+
+class VertexEmbeddingBackend(EmbeddingBackend):
+    """
+    Google Vertex AI text embeddings. The Vertex SDK is only imported when this backend is created.
+
+    param model_name: The Vertex embedding model, e.g. "textembedding-gecko@003".
+    param project: The Google Cloud project ID where the embedding model is hosted.
+    param location: The location of the Google Cloud project, such as 'us-central1'.
+    """
+    def __init__(self, model_name, project, location):
+        os.environ.setdefault('GRPC_DNS_RESOLVER', 'native')
+        from langchain_google_vertexai import VertexAIEmbeddings
+
+        key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+        if key_path:
+            print(f"Current service account key file: {key_path}")
+        else:
+            print("GOOGLE_APPLICATION_CREDENTIALS is not set.")
+
+        self.client = VertexAIEmbeddings(
+            model_name=model_name,
+            project=project,
+            location=location
+        )
+
+    def embed_documents(self, texts):
+        return self.client.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.client.embed_query(text)
+
+    def embed_queries(self, texts):
+        return self.client.embed(list(texts), embeddings_task_type="RETRIEVAL_QUERY")
+
+_TOKEN = re.compile(r"\w+")
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Fast, offline and deterministic embeddings using the hashing trick: every lowercased word and word
+    bigram is hashed (CRC32, stable across processes) to one of dim signed buckets, counts are damped
+    with log1p and the vector is L2-normalized. Texts sharing vocabulary get similar vectors, which is
+    enough to exercise chunking, storage and retrieval without a network or a model.
+
+    param dim: Vector dimension (768 matches textembedding-gecko).
+    param seed: Changes the hash functions, and therefore every vector.
+    """
+    def __init__(self, dim=768, seed=0, **_ignored):
+        self.dim = dim
+        self.seed = seed
+
+    def _features(self, text):
+        words = _TOKEN.findall(text.lower())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return [zlib.crc32(token.encode("utf-8"), self.seed) for token in tokens]
+
+    def embed_array(self, texts):
+        """
+        Returns the embeddings as a float32 array of shape (len(texts), dim).
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows, hashes = [], []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(features)
+        if hashes:
+            hashes = np.asarray(hashes, dtype=np.uint64)
+            signs = np.where((hashes // self.dim) & 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix, (np.asarray(rows), (hashes % self.dim).astype(np.intp)), signs)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed_documents(self, texts):
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.embed_array([text])[0].tolist()
+
+    def embed_queries(self, texts):
+        return self.embed_array(list(texts)).tolist()
+
+EMBEDDING_BACKENDS = {
+    "vertex": VertexEmbeddingBackend,
+    "hashing": HashingEmbeddingBackend,
+}
+
+def create_embedding_backend(backend, model_name, project, location):
+    """
+    Returns an embedding backend. backend is a name from EMBEDDING_BACKENDS or an object that
+    already implements embed_documents / embed_query, which is returned as is.
+    """
+    if not isinstance(backend, str):
+        return backend
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {sorted(EMBEDDING_BACKENDS)}.")
+    return EMBEDDING_BACKENDS[backend](model_name=model_name, project=project, location=location)
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# google.api_core / grpc / HTTP client errors that a later attempt can succeed after
+_TRANSIENT_ERROR_NAMES = {
+    "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout", "BadGateway",
+    "Aborted", "RetryError", "Timeout", "ReadTimeout", "ConnectTimeout",
+}
+
+def _status_code(error):
+    """
+    The HTTP status of an error if it carries one (google.api_core and urllib errors do), else None.
+    """
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            code = code()
+        except Exception:
+            code = None
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+def is_rate_limit_error(error):
+    """
+    True for quota errors: Vertex raises google.api_core ResourceExhausted, HTTP clients carry a 429 code.
+    """
+    if type(error).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    return _status_code(error) == 429 or str(error).startswith("429")
+
+def is_transient_error(error):
+    """
+    True for errors worth retrying: rate limits, 5xx server errors, timeouts and dropped connections.
+    Authentication failures, invalid arguments and malformed responses are not; retrying only delays them.
+    """
+    if is_rate_limit_error(error) or type(error).__name__ in _TRANSIENT_ERROR_NAMES:
+        return True
+    code = _status_code(error)
+    if code is not None:
+        return code >= 500 or code == 408
+    # urllib wraps a refused or timed-out connection in URLError.reason
+    return any(isinstance(e, (ConnectionError, TimeoutError)) for e in (error, getattr(error, "reason", None)))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose refill rate adapts to the server: it is halved on every rate-limit
+    error (down to min_rate) and creeps back up by a fixed step after every success (up to max_rate).
+
+    param rate: Initial number of requests per second.
+    param capacity: Largest burst allowed after an idle period.
+    """
+    def __init__(self, rate, capacity=None, min_rate=0.1):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def reward(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class BatchEmbedder:
+    """
+    Embeds a list of texts as fixed-size batches sent concurrently through a bounded thread pool.
+    Requests are paced by an adaptive TokenBucket; a batch that fails with a transient error (see
+    is_transient_error) is retried on its own with exponential backoff (rate-limit errors also slow the
+    bucket down), while the other batches carry on. Any other error is raised at once.
+    The vectors are returned in input order.
+
+    param embed_fn: Callable taking a list of texts and returning one vector per text,
+                    e.g. VertexAIEmbeddings.embed_documents.
+    param batch_size: Number of texts per request.
+    param max_workers: Maximum number of requests in flight.
+    param requests_per_second: Initial (and maximum) request rate.
+    param max_retries: Attempts per batch after the first one before giving up.
+    param backoff: Base delay in seconds for the exponential backoff.
+    """
+    def __init__(self, embed_fn, batch_size=32, max_workers=4, requests_per_second=5.0, max_retries=5, backoff=1.0):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        self.embed_fn = embed_fn
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(requests_per_second)
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _embed_batch(self, batch):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self._count("requests")
+            try:
+                vectors = self.embed_fn(batch)
+                if vectors is None or len(vectors) != len(batch):
+                    raise ValueError(f"Expected {len(batch)} embeddings, got {None if vectors is None else len(vectors)}.")
+                self.bucket.reward()
+                return vectors
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                if is_rate_limit_error(e):
+                    self._count("rate_limited")
+                    self.bucket.penalize()
+                self._count("retries")
+                # Full jitter keeps retrying workers from hitting the server in lockstep
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                attempt += 1
+
+    def embed(self, texts):
+        """
+        Returns one vector per text, in the same order as texts.
+        """
+        texts = list(texts)
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1 or self.max_workers <= 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+                results = list(executor.map(self._embed_batch, batches))
+        return [vector for vectors in results for vector in vectors]
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import numpy as np
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "quizify_embedding_cache")
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of embeddings for one model.
+    Vectors are stored as float32 rows of a memory-mapped file; a SQLite index maps
+    sha256(model_name, kind, text) to a row and remembers when it was last used. Once max_entries rows
+    are taken, the least recently used entry is evicted and its row reused, so the files never grow.
+
+    param directory: Directory holding the <model>.sqlite index and <model>.f32 vectors.
+    param model_name: The embedding model; it is part of every key, so models never share vectors.
+    param max_entries: Capacity in vectors (disk use is max_entries * dim * 4 bytes, allocated sparsely).
+    """
+    def __init__(self, directory, model_name, max_entries=100_000):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+        self.model_name = model_name
+        self.vectors_path = f"{base}.f32"
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.index = sqlite3.connect(f"{base}.sqlite", check_same_thread=False)
+        self.index.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        self.index.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, slot INTEGER UNIQUE, last_used REAL)"
+        )
+        self.index.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self.index.execute("INSERT OR IGNORE INTO meta VALUES ('max_entries', ?)", (max_entries,))
+        self.index.commit()
+        # The capacity is fixed when the files are first created
+        self.max_entries = self._meta("max_entries")
+        self.dim = self._meta("dim")
+        self.vectors = self._open_vectors() if self.dim else None
+
+    def _meta(self, name):
+        row = self.index.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _open_vectors(self):
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        return np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.max_entries, self.dim))
+
+    def _key(self, text, kind):
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).digest()
+
+    def get_many(self, texts, kind="document"):
+        """
+        Returns a list aligned with texts holding a vector (list of floats) for every hit and None for every miss.
+        param kind: "document" or "query"; some models embed the two differently.
+        """
+        keys = [self._key(text, kind) for text in texts]
+        results = [None] * len(texts)
+        with self.lock:
+            if self.vectors is None:
+                self.misses += len(texts)
+                return results
+            slots = {}
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                slots.update(self.index.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall())
+            for i, key in enumerate(keys):
+                slot = slots.get(key)
+                if slot is not None:
+                    results[i] = self.vectors[slot].tolist()
+            if slots:
+                now = time.time()
+                self.index.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in slots])
+                self.index.commit()
+            found = sum(result is not None for result in results)
+            self.hits += found
+            self.misses += len(texts) - found
+        return results
+
+    def put_many(self, texts, vectors, kind="document"):
+        """
+        Stores one vector per text, evicting the least recently used entries when the cache is full.
+        """
+        if not texts:
+            return
+        with self.lock:
+            if self.vectors is None:
+                self.dim = len(vectors[0])
+                self.index.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (self.dim,))
+                self.vectors = self._open_vectors()
+            count = self.index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            now = time.time()
+            for text, vector in zip(texts, vectors):
+                if len(vector) != self.dim:
+                    continue
+                key = self._key(text, kind)
+                row = self.index.execute("SELECT slot FROM entries WHERE key = ?", (key,)).fetchone()
+                if row:
+                    slot = row[0]
+                elif count < self.max_entries:
+                    # Rows are handed out densely until the cache is full
+                    slot = count
+                    count += 1
+                else:
+                    slot = self.index.execute("SELECT slot FROM entries ORDER BY last_used LIMIT 1").fetchone()[0]
+                    self.index.execute("DELETE FROM entries WHERE slot = ?", (slot,))
+                self.vectors[slot] = np.asarray(vector, dtype=np.float32)
+                self.index.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, slot, now))
+            self.vectors.flush()
+            self.index.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters, the hit rate and the number of stored vectors.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            entries = self.index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+            }
@@ -1,6 +1,10 @@
-from langchain_google_vertexai import VertexAIEmbeddings
 import os
-os.environ['GRPC_DNS_RESOLVER'] = 'native'
+import sys
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath('../../'))
+from tasks.task_4.backends import create_embedding_backend
+from tasks.task_4.batch_embedder import BatchEmbedder
+from tasks.task_4.embedding_cache import EmbeddingCache
 
 class EmbeddingClient:
     """
@@ -8,28 +12,71 @@ class EmbeddingClient:
     - model_name: A string representing the name of the model to use for embeddings.
     - project: The Google Cloud project ID where the embedding model is hosted.
     - location: The location of the Google Cloud project, such as 'us-central1'.
+    - batch_size: If set, embed_documents sends batches of this size concurrently, rate limited and retried (see BatchEmbedder).
+    - max_workers: Maximum number of batches in flight when batching.
+    - requests_per_second: Initial request rate when batching; it adapts down on quota errors.
+    - cache_dir: If set, embeddings are cached on disk there (see EmbeddingCache) and known texts are never sent again.
+    - cache_max_entries: Capacity of the embedding cache in vectors.
+    - backend: "vertex" (default), "hashing" for a fast offline embedder, or any object with
+      embed_documents / embed_query (see tasks/task_4/backends.py).
     """ 
-    def __init__(self, model_name, project, location):
-        # Initialize the VertexAIEmbeddings client
+    def __init__(self, model_name, project, location, batch_size=None, max_workers=4, requests_per_second=5.0,
+                 cache_dir=None, cache_max_entries=100_000, backend="vertex"):
+        # Initialize the embedding backend (VertexAIEmbeddings by default)
         try:
-            self.client = VertexAIEmbeddings(
-                model_name=model_name,
-                project=project,
-                location=location
-            )
+            self.client = create_embedding_backend(backend, model_name, project, location)
         #Notify if doesn't work
         except Exception as e:
             print(f"Failed to initialize client: {e}")
             self.client = None
 
+        self.batcher = None
+        if batch_size and self.client is not None:
+            self.batcher = BatchEmbedder(
+                self.client.embed_documents,
+                batch_size=batch_size,
+                max_workers=max_workers,
+                requests_per_second=requests_per_second,
+            )
+
+        # Vectors from different backends must never share cache entries
+        backend_name = backend if isinstance(backend, str) else type(backend).__name__
+        cache_model = model_name if backend_name == "vertex" else f"{backend_name}-{model_name}"
+        self.cache = EmbeddingCache(cache_dir, cache_model, cache_max_entries) if cache_dir else None
+
     """
     param query: The text query to embed.
     return: The embeddings for the query or None if the operation fails.
     """
     def embed_query(self, query):
+        if self.cache is not None:
+            cached = self.cache.get_many([query], kind="query")[0]
+            if cached is not None:
+                return cached
         vectors = self.client.embed_query(query)
+        if self.cache is not None and vectors:
+            self.cache.put_many([query], [vectors], kind="query")
         return vectors
     
+    """
+    Embed several search queries with a single backend call.
+    param queries: A list of query strings.
+    return: One query embedding per query, in order.
+    """
+    def embed_queries(self, queries):
+        queries = list(queries)
+        vectors = self.cache.get_many(queries, kind="query") if self.cache is not None else [None] * len(queries)
+        missing = list(dict.fromkeys(query for query, vector in zip(queries, vectors) if vector is None))
+        if missing:
+            # Backends without a batch call (e.g. plain LangChain embeddings) fall back to one call per query
+            embed_queries = getattr(self.client, "embed_queries", None)
+            fresh = embed_queries(missing) if embed_queries else [self.client.embed_query(query) for query in missing]
+            if self.cache is not None:
+                self.cache.put_many(missing, fresh, kind="query")
+            by_text = dict(zip(missing, fresh))
+            vectors = [vector if vector is not None else by_text[query] for query, vector in zip(queries, vectors)]
+        return vectors
+
     """
     Retrieve embeddings for multiple documents.
     param documents: A list of text documents to embed.
@@ -37,16 +84,25 @@ class EmbeddingClient:
     """
     def embed_documents(self, documents):
         try:
-            return self.client.embed_documents(documents)
+            if self.cache is None:
+                return self._embed_documents_remote(documents)
+            # Only texts the cache has never seen are sent, each of them once
+            vectors = self.cache.get_many(documents, kind="document")
+            missing = list(dict.fromkeys(doc for doc, vector in zip(documents, vectors) if vector is None))
+            if missing:
+                fresh = self._embed_documents_remote(missing)
+                self.cache.put_many(missing, fresh, kind="document")
+                by_text = dict(zip(missing, fresh))
+                vectors = [vector if vector is not None else by_text[doc] for doc, vector in zip(documents, vectors)]
+            return vectors
         except AttributeError:
             print("Method embed_documents not defined for the client.")
             return None
-        
-key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-if key_path:
-    print(f"Current service account key file: {key_path}")
-else:
-    print("GOOGLE_APPLICATION_CREDENTIALS is not set.")
+
+    def _embed_documents_remote(self, documents):
+        if self.batcher:
+            return self.batcher.embed(documents)
+        return self.client.embed_documents(documents)
 
 if __name__ == "__main__":
     model_name = "textembedding-gecko@003"
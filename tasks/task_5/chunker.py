@@ -0,0 +1,88 @@
+from collections import deque
+from langchain_core.documents import Document
+
+# Deletes the ASCII control characters; non-ASCII is dropped by the encode step in clean_text_fast
+_CONTROL_CHARACTERS = str.maketrans("", "", "".join(chr(c) for c in (*range(0x20), 0x7F)))
+
+def clean_text_fast(text):
+    """
+    Same result as re.sub(r'[^\x20-\x7E]', '', text), without the regex engine.
+    """
+    return text.encode("ascii", "ignore").decode("ascii").translate(_CONTROL_CHARACTERS)
+
+class Chunker:
+    """
+    Splits pages into overlapping chunks in a single pass, cleaning every piece of text exactly once.
+    Pages are split on the separator, each piece is cleaned, and pieces are greedily merged into chunks
+    of at most chunk_size characters that share about chunk_overlap characters with the previous chunk.
+    The greedy merge follows CharacterTextSplitter, but lengths are measured after cleaning and pieces are
+    joined with the cleaned separator (empty for the default blank-line separator), so chunk boundaries
+    differ from CharacterTextSplitter's on the raw text; expect somewhat fewer, fuller chunks.
+    Because the overlap reuses already cleaned pieces, overlapping text is never cleaned twice.
+    Every chunk keeps its page's metadata plus the character span it covers in the original page text.
+
+    param chunk_size: Maximum number of characters per chunk (a single longer piece becomes its own chunk).
+    param chunk_overlap: Number of characters shared with the previous chunk.
+    param separator: The string pages are split on.
+    """
+    def __init__(self, chunk_size=1000, chunk_overlap=200, separator="\n\n"):
+        if chunk_overlap > chunk_size:
+            raise ValueError("chunk_overlap cannot be larger than chunk_size.")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separator = separator
+        # Chunks are joined with the cleaned separator, which is what cleaning a joined chunk would leave
+        self.joiner = clean_text_fast(separator)
+
+    def _pieces(self, text):
+        """
+        Yields (cleaned piece, start, end) for every non-empty piece, with offsets into the raw text.
+        """
+        start = 0
+        step = len(self.separator)
+        while start <= len(text):
+            end = text.find(self.separator, start) if step else -1
+            if end == -1:
+                end = len(text)
+            piece = clean_text_fast(text[start:end]).strip()
+            if piece:
+                yield piece, start, end
+            start = end + step if step else len(text) + 1
+
+    def split_text(self, text, metadata=None):
+        """
+        Yields the chunks of one page as Documents.
+        param text: The raw page text.
+        param metadata: Metadata copied into every chunk (e.g. source and page).
+        """
+        metadata = metadata or {}
+        joiner_len = len(self.joiner)
+        window = deque()  # (piece, start, end)
+        total = 0
+
+        def emit():
+            return Document(
+                page_content=self.joiner.join(piece for piece, _, _ in window),
+                metadata={**metadata, "start_index": window[0][1], "end_index": window[-1][2]},
+            )
+
+        for piece, start, end in self._pieces(text):
+            length = len(piece)
+            if window and total + length + joiner_len > self.chunk_size:
+                yield emit()
+                # Drop pieces from the front until what is left fits as overlap
+                while window and (total > self.chunk_overlap or total + length + joiner_len > self.chunk_size):
+                    total -= len(window[0][0]) + (joiner_len if len(window) > 1 else 0)
+                    window.popleft()
+            total += length + (joiner_len if window else 0)
+            window.append((piece, start, end))
+
+        if window:
+            yield emit()
+
+    def split_documents(self, pages):
+        """
+        Yields the chunks of every page, in page order. Works on any iterable, including a generator of pages.
+        """
+        for page in pages:
+            yield from self.split_text(page.page_content, page.metadata)
@@ -1,68 +1,193 @@
 import sys
 import os
-import streamlit as st
 import re
+import hashlib
+import queue
+import tempfile
+import threading
+import time
 
-sys.path.append(os.path.abspath('../../'))
-from tasks.task_3.task_3 import DocumentProcessor
-from tasks.task_4.task_4 import EmbeddingClient
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath('../../'))
+from tasks._lazy import lazy_import
+from tasks.task_5.chunker import Chunker
+from tasks.task_5.vector_index import NumpyVectorStore
 
 
 # Import Task libraries
 from langchain_core.documents import Document
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Chroma
 
-os.environ['GRPC_DNS_RESOLVER'] = 'native'
+st = lazy_import("streamlit")  # Only needed once a collection is built or queried
+
+def chroma_class():
+    """
+    Imports the Chroma vector store on first use; its client stack is one of the slowest imports of the app.
+    """
+    os.environ.setdefault('GRPC_DNS_RESOLVER', 'native')
+    from langchain_community.vectorstores import Chroma
+    return Chroma
+
+# Where the app keeps its persistent collections: outside the source tree, like the other caches,
+# unless QUIZIFY_CHROMA_DIRECTORY points elsewhere (e.g. a durable data volume)
+DEFAULT_PERSIST_DIRECTORY = os.getenv(
+    "QUIZIFY_CHROMA_DIRECTORY", os.path.join(tempfile.gettempdir(), "quizify_chroma_db")
+)
 
-# Remove non-printable characters
+# Collection metadata key set to True only once a build has added every chunk (see _mark_complete)
+COMPLETE_KEY = "quizify_complete"
+
+# Remove non-printable characters (kept for callers outside the Chunker; see chunker.clean_text_fast)
 def clean_text(text):
     return re.sub(r'[^\x20-\x7E]', '', text)
 
+def chunk_id(document):
+    """
+    Stable ID of a chunk: the SHA-256 of its whitespace-normalized text and its source.
+    The same chunk from the same file always gets the same ID, so it is only ever embedded once.
+    """
+    normalized = " ".join(document.page_content.split())
+    source = str(document.metadata.get("source", ""))
+    return hashlib.sha256(f"{source}\0{normalized}".encode("utf-8")).hexdigest()
+
 #creating a ChromeCollection, but utilizing processor and embeddings configuration created prviously
 class ChromaCollectionCreator:
     """
     Initializes the ChromaCollectionCreator with a DocumentProcessor instance and embeddings configuration.
     param processor: An instance of DocumentProcessor that has processed documents.
     param embeddings_config: An embedding client for embedding documents.
+    param chunker: An optional Chunker, to change the chunk size, overlap or separator.
+    param persist_directory: If set, the collection is stored on disk there and updated incrementally:
+                             chunks are keyed by chunk_id and only chunks not already stored get embedded.
+    param collection_name: Name of the persistent collection (e.g. one per corpus).
+    param store: "chroma" (default) or "numpy" for an in-process NumpyVectorStore, which is faster for
+                 small per-session corpora but cannot be persisted.
+    param vector_dtype: Storage of the numpy store's search matrix: "float32", or "float16" / "int8" to
+                        cut its memory by 2x / 4x (candidates are rescored in float32, see NumpyVectorStore).
+                        Only the numpy store supports the smaller types.
     """
-    def __init__(self, processor, embed_model):
+    def __init__(self, processor, embed_model, chunker=None, persist_directory=None, collection_name="quizify",
+                 store="chroma", vector_dtype="float32"):
+        if store not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown vector store {store!r}, expected 'chroma' or 'numpy'.")
+        if store == "numpy" and persist_directory:
+            raise ValueError("The numpy vector store cannot be persisted.")
+        if store == "chroma" and vector_dtype != "float32":
+            raise ValueError(f"vector_dtype {vector_dtype!r} needs store='numpy'; Chroma always stores float32.")
         self.processor = processor      
         self.embed_model = embed_model  
+        self.chunker = chunker or Chunker(separator="\n\n", chunk_size=1000, chunk_overlap=200)
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self.store = store
+        self.vector_dtype = vector_dtype
         self.db = None                  
-    
+        self.version = 0                # Bumped whenever the collection changes, so cached retrievals can be invalidated
+        self.stats = {}                 # Timings and counts of the last build
+
+    def _open_db(self):
+        if self.store == "numpy":
+            return NumpyVectorStore(self.embed_model, dtype=self.vector_dtype)
+        Chroma = chroma_class()
+        if self.persist_directory:
+            return Chroma(
+                collection_name=self.collection_name,
+                embedding_function=self.embed_model,
+                persist_directory=self.persist_directory,
+            )
+        return Chroma(embedding_function=self.embed_model)
+
+    def open_chroma_collection(self):
+        """
+        Opens an existing persistent collection without embedding anything.
+        Returns True if a build of the collection ran to completion, in which case it is ready to query.
+        A collection left behind by a build that failed partway is not opened; create_chroma_collection
+        then embeds only its missing chunks.
+        """
+        if not self.persist_directory:
+            return False
+        db = self._open_db()
+        if not (db._collection.metadata or {}).get(COMPLETE_KEY) or db._collection.count() == 0:
+            return False
+        self.db = db
+        self.version += 1
+        return True
+
+    def close(self):
+        """
+        Releases the collection (e.g. the numpy store's temporary vector file). Called by ResourceRegistry
+        when the creator is evicted.
+        """
+        close = getattr(self.db, "close", None)
+        if callable(close) and self.store == "numpy":
+            close()
+        self.db = None
+
+    def _mark_complete(self, complete):
+        """
+        Records in the persistent collection's metadata whether its last build finished.
+        It is cleared before a build adds anything, so a build that dies partway leaves it unset.
+        """
+        if not self.persist_directory:
+            return
+        # Chroma refuses to modify the distance settings, so only pass the other keys back
+        metadata = {
+            key: value for key, value in (self.db._collection.metadata or {}).items() if not key.startswith("hnsw:")
+        }
+        metadata[COMPLETE_KEY] = complete
+        self.db._collection.modify(metadata=metadata)
+
+    def _add_new_documents(self, documents, batch_size=1000):
+        """
+        Adds the documents whose chunk_id is not in the collection yet and returns how many were embedded.
+        """
+        unique = {}
+        for document in documents:
+            unique.setdefault(chunk_id(document), document)
+        ids = list(unique)
+        existing = set()
+        for i in range(0, len(ids), batch_size):
+            existing.update(self.db.get(ids=ids[i:i + batch_size], include=[])["ids"])
+        new_ids = [id_ for id_ in ids if id_ not in existing]
+        for i in range(0, len(new_ids), batch_size):
+            batch_ids = new_ids[i:i + batch_size]
+            self.db.add_documents([unique[id_] for id_ in batch_ids], ids=batch_ids)
+        self.stats["embedded"] = self.stats.get("embedded", 0) + len(new_ids)
+        self.stats["skipped"] = self.stats.get("skipped", 0) + len(documents) - len(new_ids)
+        return len(new_ids)
+
     #Create a Chroma collection from the documents processed by the DocumentProcessor instance.
     def create_chroma_collection(self):    
         # Check if the document exists
-        if len(self.processor.pages) == 0:
+        if not self.processor.has_documents():
             st.error("No documents found!", icon="🚨")
             return
-        
-        #if file exists, split it into chunks which can be put into ChromaCollection
-        text_splitter = CharacterTextSplitter(
-            separator="\n\n",
-            chunk_size=1000,
-            chunk_overlap=200,
-        )
 
-        #Put all of the chunks into texts
-        texts = []
-        for doc in self.processor.pages:
-            chunk = text_splitter.split_text(doc.page_content)
-            texts.extend(chunk)
-        texts = [clean_text(doc) for doc in texts]
-        if texts is not None:
-            st.success(f"Successfully split pages to {len(texts)} documents!", icon="✅")
+        self.stats = {}
 
-        #cast to Document type
-        documents = []
-        for text in texts:
-            documents.append(Document(page_content=text))
+        # A streaming processor has not parsed anything yet, so build the collection as pages arrive
+        if self.processor.stream:
+            return self.create_chroma_collection_streaming()
+        
+        #if file exists, split it into cleaned chunks (with page metadata) which can be put into ChromaCollection
+        documents = list(self.chunker.split_documents(self.processor.pages))
+        st.success(f"Successfully split pages to {len(documents)} documents!", icon="✅")
 
         #Create a Chroma collection from the documents
         try:
-            self.db = Chroma.from_documents(documents=documents, embedding=self.embed_model)
+            if self.persist_directory:
+                self.db = self._open_db()
+                self._mark_complete(False)
+                self._add_new_documents(documents)
+                self._mark_complete(True)
+            elif self.store == "numpy":
+                self.db = NumpyVectorStore.from_documents(
+                    documents=documents, embedding=self.embed_model, dtype=self.vector_dtype
+                )
+            else:
+                self.db = chroma_class().from_documents(documents=documents, embedding=self.embed_model)
         except Exception as e:
+            self.db = None  # A partly built collection must not be served as if it were complete
+            texts = [doc.page_content for doc in documents]
             for i, doc in enumerate(texts):
                 print(f"Document {i}: {doc}")
                 #something's wrong if the document is too short
@@ -73,11 +198,114 @@ class ChromaCollectionCreator:
             print(f"Number of documents: {len(texts)}")
             raise e
         
+        self.version += 1
         if self.db:
             st.success("Successfully created Chroma Collection!", icon="✅")
         else:
             st.error("Failed to create Chroma Collection!", icon="🚨")
 
+    def create_chroma_collection_streaming(self, batch_size=64, max_pending_batches=4):
+        """
+        Builds the Chroma collection as a pipeline instead of stage by stage.
+        A background thread pulls pages from processor.iter_pages(), chunks and cleans them and puts
+        batches of chunks on a bounded queue; this thread embeds and inserts each batch as it arrives.
+        Only max_pending_batches batches are ever held in memory, so peak memory does not grow with the
+        corpus, and the first chunks are searchable before the last PDF is parsed.
+        param batch_size: Number of chunks embedded and inserted per call.
+        param max_pending_batches: Capacity of the queue between chunking and embedding.
+        """
+        batches = queue.Queue(maxsize=max_pending_batches)
+        done = object()
+        errors = []
+        stop = threading.Event()
+
+        def put(item):
+            # Give up waiting on a full queue if the consumer has stopped
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            batch = []
+            try:
+                for chunk in self.chunker.split_documents(self.processor.iter_pages()):
+                    batch.append(chunk)
+                    if len(batch) >= batch_size:
+                        if not put(batch):
+                            return
+                        batch = []
+                if batch:
+                    put(batch)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put(done)
+
+        start = time.perf_counter()
+        self.processor.file_progress = []  # Not left over from an earlier iteration when first read below
+        producer = threading.Thread(target=produce, name="chroma-chunker", daemon=True)
+        producer.start()
+
+        self.db = self._open_db()
+        status = st.empty()
+        num_files = len(self.processor.files)
+        progress = st.progress(0.0, text="Parsing PDFs...") if num_files else None
+        reported = 0  # Files of processor.file_progress already reported
+        num_chunks = 0
+
+        def report_files():
+            # iter_pages runs in the producer thread and must not touch Streamlit, so progress is shown from here
+            nonlocal reported
+            parsed = self.processor.file_progress[:]
+            for file_name, num_pages in parsed[reported:]:
+                st.write(f"{file_name}: the PDF contains {num_pages} pages.")
+            reported = len(parsed)
+            if progress is not None:
+                progress.progress(reported / num_files, text=f"Parsed {reported} of {num_files} PDFs")
+
+        try:
+            self._mark_complete(False)
+            while True:
+                batch = batches.get()
+                if batch is done:
+                    break
+                if self.persist_directory:
+                    self._add_new_documents(batch)
+                else:
+                    self.db.add_documents(batch)
+                self.version += 1
+                if num_chunks == 0:
+                    self.stats["first_chunk_seconds"] = time.perf_counter() - start
+                num_chunks += len(batch)
+                report_files()
+                status.write(f"Embedded {num_chunks} chunks...")
+            report_files()
+        except BaseException:
+            self.db = None  # A partly built collection must not be served as if it were complete
+            raise
+        finally:
+            stop.set()
+            producer.join()
+
+        if errors:
+            self.db = None
+            print("Error while parsing or chunking documents:")
+            raise errors[0]
+        if num_chunks > 0:
+            self._mark_complete(True)
+
+        self.stats["total_seconds"] = time.perf_counter() - start
+        self.stats["num_chunks"] = num_chunks
+        if num_chunks > 0:
+            st.success(f"Successfully streamed {num_chunks} chunks into the Chroma Collection!", icon="✅")
+        else:
+            self.db = None
+            st.error("Failed to create Chroma Collection!", icon="🚨")
+
     """
     Queries the created Chroma collection for documents similar to the query.
     param query: The query string to search for in the Chroma collection.
@@ -93,8 +321,48 @@ class ChromaCollectionCreator:
         else:
             st.error("Chroma Collection has not been created!", icon="🚨")
 
+    def query_chroma_collection_batch(self, queries, k=4):
+        """
+        Queries the collection for several queries at once: all queries are embedded in one call and
+        searched in one vectorized query.
+        param queries: A list of query strings.
+        param k: Number of results per query.
+        Returns a list with, for every query, up to k (Document, relevance score) pairs, best first.
+        """
+        queries = list(queries)
+        if not self.db:
+            st.error("Chroma Collection has not been created!", icon="🚨")
+            return [[] for _ in queries]
+        if not queries:
+            return []
+        embed_queries = getattr(self.embed_model, "embed_queries", None)
+        vectors = embed_queries(queries) if embed_queries else [self.embed_model.embed_query(query) for query in queries]
+        return self.search_by_vectors(vectors, k)
+
+    def search_by_vectors(self, vectors, k=4):
+        """
+        Returns, for every query vector, up to k (Document, relevance score) pairs, best first.
+        """
+        if isinstance(self.db, NumpyVectorStore):
+            return self.db.search_by_vectors_with_relevance_scores(vectors, k)
+        # Chroma answers a list of query embeddings in a single call
+        results = self.db._collection.query(
+            query_embeddings=vectors, n_results=k, include=["documents", "metadatas", "distances"]
+        )
+        relevance = self.db._select_relevance_score_fn()
+        return [
+            [
+                (Document(page_content=text, metadata=metadata or {}), relevance(distance))
+                for text, metadata, distance in zip(texts, metadatas, distances)
+            ]
+            for texts, metadatas, distances in zip(results["documents"], results["metadatas"], results["distances"])
+        ]
+
 #Testing
 if __name__ == "__main__":
+    from tasks.task_3.task_3 import DocumentProcessor
+    from tasks.task_4.task_4 import EmbeddingClient
+
     processor = DocumentProcessor() # Initialize from Task 3
     processor.ingest_documents()
     
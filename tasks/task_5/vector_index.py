@@ -0,0 +1,261 @@
+import os
+import tempfile
+import uuid
+import weakref
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+def normalize_rows(vectors):
+    """
+    Returns the vectors as a float32 matrix with unit-length rows (zero rows are left as zeros).
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k(scores, k):
+    """
+    Indices of the k highest scores in every row of a 2-D score matrix, best first.
+    argpartition keeps this O(n) per row instead of a full sort.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+def _remove_file(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+# Rows per block when quantized rows are converted to float32 for scoring, bounding the temporary copy
+_SCORE_BLOCK_ROWS = 16384
+
+class _GrowableMatrix:
+    """
+    A 2-D array that grows by doubling its capacity, optionally backed by a memory-mapped file.
+    """
+    def __init__(self, dtype, path=None, initial_capacity=1024):
+        self.dtype = np.dtype(dtype)
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self.array = None
+        self.size = 0
+
+    @property
+    def data(self):
+        return self.array[:self.size]
+
+    @property
+    def nbytes(self):
+        return 0 if self.array is None else self.array.nbytes
+
+    def _allocate(self, capacity, width):
+        if self.path:
+            # Growing the file keeps existing rows in place; the new map simply covers more of it
+            with open(self.path, "ab") as f:
+                f.truncate(capacity * width * self.dtype.itemsize)
+            return np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity, width))
+        array = np.empty((capacity, width), dtype=self.dtype)
+        if self.array is not None:
+            array[:self.size] = self.array[:self.size]
+        return array
+
+    def append(self, rows):
+        if self.array is None:
+            if self.path and os.path.exists(self.path):
+                os.unlink(self.path)  # A new store never inherits rows it has no documents for
+            self.array = self._allocate(max(self.initial_capacity, len(rows)), rows.shape[1])
+        elif rows.shape[1] != self.array.shape[1]:
+            raise ValueError(f"Expected vectors of dimension {self.array.shape[1]}, got {rows.shape[1]}.")
+        needed = self.size + len(rows)
+        if needed > self.array.shape[0]:
+            self.array = self._allocate(max(needed, 2 * self.array.shape[0]), self.array.shape[1])
+        self.array[self.size:needed] = rows
+        self.size = needed
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process vector store holding unit-normalized vectors in one contiguous matrix.
+    A search is one matrix product followed by an argpartition top-k, for any number of queries at once.
+    The matrix grows by doubling, so appends never rebuild anything; with mmap_path it lives in a
+    memory-mapped file and the OS pages it in and out instead of keeping it all in RAM.
+    Relevance scores are the cosine similarity mapped to [0, 1] as (1 + cos) / 2.
+
+    To shrink large collections the search matrix can be quantized: "float16" halves it and "int8"
+    (symmetric, one float32 scale per row) quarters it. With rescore, the full float32 vectors are kept
+    in a memory-mapped file instead of RAM; the quantized matrix picks oversample * k candidates and
+    only those rows are read back to compute exact scores, which recovers nearly all of the recall.
+
+    param embedding: The embedding client (anything with embed_documents / embed_query).
+    param mmap_path: Optional file backing the float32 vectors (the search matrix, or the rescoring copy
+                     when quantized; a temporary file is used for the latter if not given, and deleted
+                     by close() or when the store is garbage collected).
+    param initial_capacity: Number of rows allocated up front.
+    param dtype: "float32" (default), "float16" or "int8" storage for the search matrix.
+    param rescore: Rescore quantized candidates with the float32 vectors.
+    param oversample: Candidates per result fetched from the quantized matrix before rescoring.
+    """
+    def __init__(self, embedding, mmap_path=None, initial_capacity=1024, dtype="float32", rescore=True, oversample=4):
+        if dtype not in ("float32", "float16", "int8"):
+            raise ValueError(f"Unknown vector dtype {dtype!r}, expected 'float32', 'float16' or 'int8'.")
+        self._embedding = embedding
+        self.mmap_path = mmap_path
+        self.dtype = dtype
+        self.rescore = rescore and dtype != "float32"
+        self.oversample = oversample
+        self._vectors = _GrowableMatrix(dtype, mmap_path if dtype == "float32" else None, initial_capacity)
+        self._scales = _GrowableMatrix(np.float32, None, initial_capacity) if dtype == "int8" else None
+        self._full = None
+        self._finalizer = None
+        if self.rescore:
+            if not mmap_path:
+                handle, mmap_path = tempfile.mkstemp(prefix="quizify_vectors_", suffix=".f32")
+                os.close(handle)
+                self.mmap_path = mmap_path
+                # Only a file the store created itself is removed; a caller's mmap_path is left alone
+                self._finalizer = weakref.finalize(self, _remove_file, mmap_path)
+            self._full = _GrowableMatrix(np.float32, mmap_path, initial_capacity)
+        self._documents = []
+        self._ids = []
+        self._id_set = set()
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def close(self):
+        """
+        Releases the vectors and deletes the temporary rescoring file, if the store created one.
+        The store must not be used afterwards.
+        """
+        self._vectors = self._scales = self._full = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __len__(self):
+        return self._vectors.size
+
+    def memory_bytes(self):
+        """
+        Bytes of vector data held in RAM (memory-mapped rescoring vectors are not counted).
+        """
+        total = self._vectors.nbytes if not self._vectors.path else 0
+        if self._scales is not None:
+            total += self._scales.nbytes
+        return total
+
+    def _append(self, vectors):
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+            scales[scales == 0] = 1.0
+            self._vectors.append(np.round(vectors / scales).astype(np.int8))
+            self._scales.append(scales.astype(np.float32))
+        else:
+            self._vectors.append(vectors.astype(self.dtype))
+        if self._full is not None:
+            self._full.append(vectors)
+
+    def _scores(self, queries):
+        """
+        Cosine similarities of every query against every stored vector, shape (queries, rows).
+        """
+        matrix = self._vectors.data
+        if self.dtype == "float32":
+            return queries @ matrix.T
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), _SCORE_BLOCK_ROWS):
+            block = matrix[start:start + _SCORE_BLOCK_ROWS].astype(np.float32)
+            if self._scales is not None:
+                block *= self._scales.data[start:start + _SCORE_BLOCK_ROWS]
+            scores[:, start:start + _SCORE_BLOCK_ROWS] = queries @ block.T
+        return scores
+
+    def add_vectors(self, vectors, documents, ids=None):
+        """
+        Appends precomputed vectors with their documents and returns their IDs.
+        """
+        if len(documents) == 0:
+            return []
+        vectors = normalize_rows(vectors)
+        if len(vectors) != len(documents):
+            raise ValueError("Expected one vector per document.")
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in documents]
+        self._append(vectors)
+        self._documents.extend(documents)
+        self._ids.extend(ids)
+        self._id_set.update(ids)
+        return ids
+
+    def add_texts(self, texts, metadatas=None, *, ids=None, **kwargs):
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=dict(metadata)) for text, metadata in zip(texts, metadatas)]
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_vectors(vectors, documents, ids)
+
+    def search_by_vectors(self, query_vectors, k=4):
+        """
+        Returns, for every query vector, the k best (Document, cosine similarity) pairs, best first.
+        All queries are answered with a single matrix product.
+        """
+        queries = normalize_rows(query_vectors)
+        if len(self) == 0:
+            return [[] for _ in range(len(queries))]
+        scores = self._scores(queries)
+        if not self.rescore:
+            indices = top_k(scores, k)
+            return [
+                [(self._documents[i], float(row_scores[i])) for i in row_indices]
+                for row_indices, row_scores in zip(indices, scores)
+            ]
+        results = []
+        full = self._full.data
+        for query, candidates in zip(queries, top_k(scores, k * self.oversample)):
+            rows = np.sort(candidates)  # Sorted reads are sequential on the memory map
+            exact = full[rows] @ query
+            best = top_k(exact[None, :], k)[0]
+            results.append([(self._documents[rows[j]], float(exact[j])) for j in best])
+        return results
+
+    def search_by_vectors_with_relevance_scores(self, query_vectors, k=4):
+        """
+        Same as search_by_vectors, with scores mapped to [0, 1] relevance.
+        """
+        return [[(doc, (1.0 + score) / 2.0) for doc, score in hits] for hits in self.search_by_vectors(query_vectors, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.search_by_vectors([self._embedding.embed_query(query)], k)[0]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.search_by_vectors([embedding], k)[0]]
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _similarity_search_with_relevance_scores(self, query, k=4, **kwargs):
+        return self.search_by_vectors_with_relevance_scores([self._embedding.embed_query(query)], k)[0]
+
+    def get(self, ids=None, include=None, **kwargs):
+        """
+        Minimal Chroma-style get: returns which of the given IDs (or all IDs) are stored.
+        """
+        if ids is None:
+            return {"ids": list(self._ids)}
+        return {"ids": [id_ for id_ in ids if id_ in self._id_set]}
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, *, ids=None, **kwargs):
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,78 @@
+import threading
+
+class ContextScheduler:
+    """
+    Gives every question attempt its own slice of the chunks relevant to the topic, so the LLM does not
+    see the same top-k context (and write the same question) over and over.
+    The top k * num_questions chunks are retrieved once and cut into num_questions slices of k chunks;
+    attempts take the slices in turn and wrap around.
+
+    Strategies:
+    - "round_robin": slice i holds ranks i, i + num_questions, i + 2 * num_questions, ..., so every
+      slice mixes highly and less relevant chunks.
+    - "mmr": the pool is ordered by maximal marginal relevance and cut into consecutive slices, so the
+      first slices are both relevant and mutually diverse. Falls back to round_robin for stores
+      without MMR support.
+
+    It also counts attempts and accepted questions to report retries per accepted question.
+
+    :param db: The LangChain vector store to retrieve from.
+    :param topic: The quiz topic used as the retrieval query.
+    :param num_questions: Number of slices to prepare.
+    :param k: Chunks per slice.
+    :param strategy: "round_robin" or "mmr".
+    """
+    def __init__(self, db, topic, num_questions, k=4, strategy="round_robin"):
+        if strategy not in ("round_robin", "mmr"):
+            raise ValueError(f"Unknown context strategy {strategy!r}, expected 'round_robin' or 'mmr'.")
+        self.db = db
+        self.topic = topic
+        self.num_questions = max(1, num_questions)
+        self.k = k
+        self.strategy = strategy
+        self.lock = threading.Lock()
+        self.slices = None
+        self.next_slice = 0
+        self.attempts = 0
+        self.accepted = 0
+
+    def _build_slices(self):
+        pool_size = self.k * self.num_questions
+        if self.strategy == "mmr":
+            try:
+                pool = self.db.max_marginal_relevance_search(self.topic, k=pool_size, fetch_k=4 * pool_size)
+                return [pool[i:i + self.k] for i in range(0, len(pool), self.k)] or [[]]
+            except NotImplementedError:
+                pass
+        pool = self.db.similarity_search(self.topic, k=pool_size)
+        slices = [pool[i::self.num_questions] for i in range(self.num_questions)]
+        return [chunk for chunk in slices if chunk] or [[]]
+
+    def next_context(self):
+        """
+        Returns the context text for the next attempt.
+        """
+        with self.lock:
+            if self.slices is None:
+                self.slices = self._build_slices()
+            documents = self.slices[self.next_slice % len(self.slices)]
+            self.next_slice += 1
+        return "\n\n".join(document.page_content for document in documents)
+
+    def record(self, accepted):
+        """
+        Records the outcome of one attempt.
+        """
+        with self.lock:
+            self.attempts += 1
+            self.accepted += int(bool(accepted))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "strategy": self.strategy,
+                "slices": len(self.slices or []),
+                "attempts": self.attempts,
+                "accepted": self.accepted,
+                "retries_per_question": (self.attempts - self.accepted) / self.accepted if self.accepted else None,
+            }
@@ -0,0 +1,153 @@
+import re
+import threading
+import zlib
+import numpy as np
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+
+def normalize_question(text):
+    """
+    Lowercases, turns punctuation into spaces and collapses whitespace, so trivially reworded
+    copies ("What is DNA?" / "what is dna") compare equal.
+    """
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+def bands_for_threshold(threshold, num_perm):
+    """
+    Returns the number of LSH bands (a divisor of num_perm) whose candidate threshold (1/bands)^(1/rows),
+    the similarity at which a pair starts sharing a bucket, is the highest one not above threshold.
+    E.g. 16 bands of 8 rows (candidates from about 0.71) for threshold 0.75 and 128 permutations;
+    32 bands of 4 rows would already pair questions at 0.42 and compare a large part of the bank.
+    """
+    best = num_perm
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands == 0 and (1 / bands) ** (bands / num_perm) <= threshold:
+            best = min(best, bands)
+    return best
+
+class QuestionDedupIndex:
+    """
+    Thread-safe near-duplicate index for quiz questions, using MinHash signatures and LSH banding.
+    Each normalized question is shingled into character n-grams and summarized by num_perm MinHash
+    values; the signature is cut into bands and every band is a hash bucket key, so a lookup only
+    compares against questions sharing at least one bucket instead of scanning the whole bank.
+    A candidate is a duplicate when the estimated Jaccard similarity of the shingle sets reaches
+    threshold. Exact normalized matches are caught by a dictionary lookup before any signature comparison.
+    Questions that mention different numbers ("in 1914" / "in 1939") are never near-duplicates, since
+    they differ in a single shingle or two but ask different things.
+
+    :param threshold: Estimated Jaccard similarity at or above which two questions are duplicates.
+    :param num_perm: Number of MinHash functions (signature length).
+    :param bands: Number of LSH bands; num_perm must be divisible by it. More bands find more candidates.
+                  By default it is derived from threshold (see bands_for_threshold), so that buckets are only
+                  shared by pairs that are near the threshold and lookups stay sub-linear in the bank size.
+    :param shingle_size: Length of the character n-grams.
+    :param seed: Seed for the MinHash functions.
+    """
+    def __init__(self, threshold=0.75, num_perm=128, bands=None, shingle_size=3, seed=1):
+        if bands is None:
+            bands = bands_for_threshold(threshold, num_perm)
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._lock = threading.RLock()
+        self._exact = {}       # normalized text -> id
+        self._buckets = {}     # (band, band signature bytes) -> [ids]
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint64)  # row id -> signature
+        self._texts = []       # id -> original text
+        self._numbers = []     # id -> numbers mentioned in the question
+
+    def __len__(self):
+        return len(self._texts)
+
+    def _signature(self, normalized):
+        size = self.shingle_size
+        shingles = {normalized[i:i + size] for i in range(max(1, len(normalized) - size + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) % _MERSENNE_PRIME for shingle in shingles),
+            dtype=np.uint64, count=len(shingles),
+        )
+        # a * x + b stays below 2**63 because a, b < 2**31 and x < 2**31
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _prepare(self, text):
+        normalized = normalize_question(text)
+        signature = self._signature(normalized)
+        return normalized, signature, self._band_keys(signature), tuple(_NUMBER.findall(normalized))
+
+    def _find(self, normalized, signature, keys, numbers):
+        if normalized in self._exact:
+            return self._exact[normalized]
+        candidates = set()
+        for key in keys:
+            candidates.update(self._buckets.get(key, ()))
+        candidates = [candidate for candidate in candidates if self._numbers[candidate] == numbers]
+        if not candidates:
+            return None
+        candidates = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        similarity = (self._signatures[candidates] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        return int(candidates[best]) if similarity[best] >= self.threshold else None
+
+    def find_duplicate(self, text):
+        """
+        Returns the text of a stored near-duplicate of text, or None if it is unique.
+        """
+        prepared = self._prepare(text)
+        with self._lock:
+            match = self._find(*prepared)
+            return None if match is None else self._texts[match]
+
+    def add(self, text):
+        """
+        Stores text unconditionally and returns its id.
+        """
+        prepared = self._prepare(text)
+        with self._lock:
+            return self._add(text, *prepared)
+
+    def _add(self, text, normalized, signature, keys, numbers):
+        new_id = len(self._texts)
+        self._texts.append(text)
+        self._numbers.append(numbers)
+        if new_id == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[new_id] = signature
+        self._exact.setdefault(normalized, new_id)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(new_id)
+        return new_id
+
+    def add_if_unique(self, text):
+        """
+        Atomically stores text unless a near-duplicate exists. Returns True if it was stored.
+        Safe to call from several generation workers at once.
+        """
+        prepared = self._prepare(text)
+        with self._lock:
+            if self._find(*prepared) is not None:
+                return False
+            self._add(text, *prepared)
+            return True
+
+    def clear(self):
+        """
+        Forgets every stored question.
+        """
+        with self._lock:
+            self._exact.clear()
+            self._buckets.clear()
+            self._texts.clear()
+            self._numbers.clear()
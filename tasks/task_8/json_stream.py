@@ -0,0 +1,137 @@
+import json
+
+class JSONArrayStream:
+    """
+    Incrementally splits a streamed JSON array into its elements.
+    Text is fed chunk by chunk as it arrives from the LLM; whenever an element of the top-level array
+    is complete its raw JSON text is returned, so callers can json.loads and use it while the rest of
+    the array is still being generated. Anything before the opening '[' (such as a ```json fence) is
+    skipped. Only object and array elements are reported.
+    If more than max_preamble characters, or a '{', arrive before the '[', failed is set: the response is
+    prose or a lone object, not an array, and the caller can stop the stream instead of paying for the rest.
+    """
+    def __init__(self, max_preamble=200):
+        self.max_preamble = max_preamble
+        self.preamble = 0
+        self.failed = False
+        self.started = False   # Seen the opening '[' of the top-level array
+        self.finished = False  # Seen its closing ']'
+        self.depth = 0         # Nesting depth inside the top-level array
+        self.in_string = False
+        self.escape = False
+        self.element = []      # Characters of the element being read
+
+    def feed(self, chunk):
+        """
+        Consumes the next piece of text and returns the list of elements completed by it.
+        """
+        completed = []
+        for char in chunk:
+            if self.finished or self.failed:
+                break
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                else:
+                    self.preamble += 1
+                    self.failed = char == "{" or self.preamble > self.max_preamble
+                continue
+            if self.depth > 0:
+                self.element.append(char)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if self.depth == 0:
+                    self.element = [char]
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 0:
+                    self.finished = char == "]"
+                    continue
+                self.depth -= 1
+                if self.depth == 0:
+                    completed.append("".join(self.element))
+                    self.element = []
+        return completed
+
+class JSONObjectStream:
+    """
+    Incrementally finds the first JSON object in streamed LLM text.
+    Anything before the opening '{' (a ```json fence, "Here is your question:") is skipped, and the object
+    text is returned by feed as soon as its closing '}' arrives, so the rest of the response (a closing
+    fence, trailing remarks) does not have to be waited for.
+    failed is set as soon as the response can no longer contain a usable object: more than max_preamble
+    characters before the '{', or a closing bracket that does not match the open one.
+    """
+    def __init__(self, max_preamble=200):
+        self.max_preamble = max_preamble
+        self.preamble = 0
+        self.failed = False
+        self.finished = False
+        self.stack = []        # Open brackets of the object being read
+        self.in_string = False
+        self.escape = False
+        self.chars = []
+
+    def feed(self, chunk):
+        """
+        Consumes the next piece of text and returns the object text once it is complete, otherwise None.
+        """
+        for char in chunk:
+            if self.finished or self.failed:
+                return None
+            if not self.stack:
+                if char == "{":
+                    self.stack.append(char)
+                    self.chars.append(char)
+                else:
+                    self.preamble += 1
+                    self.failed = self.preamble > self.max_preamble
+                continue
+            self.chars.append(char)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.stack.append(char)
+            elif char in "}]":
+                if self.stack.pop() != ("{" if char == "}" else "["):
+                    self.failed = True
+                    return None
+                if not self.stack:
+                    self.finished = True
+                    return "".join(self.chars)
+        return None
+
+def extract_json_object(text):
+    """
+    Returns the first JSON object in an LLM response as a dict, tolerating ```json fences and text around
+    the object, or None if there is no parseable object.
+    """
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+    # Fenced or wrapped in prose: locate the object by bracket matching instead of regexes
+    found = JSONObjectStream(max_preamble=len(text)).feed(text)
+    if found is None:
+        return None
+    try:
+        return json.loads(found)
+    except json.JSONDecodeError:
+        return None
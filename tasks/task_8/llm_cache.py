@@ -0,0 +1,186 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import PrivateAttr
+from tasks.task_8.json_stream import JSONArrayStream, extract_json_object
+
+DEFAULT_LLM_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "quizify_llm_cache")
+
+def is_cacheable(response):
+    """
+    True if a response holds JSON worth replaying: a JSON object, or at least one complete element of a
+    JSON array (a batch response cut short once the quiz was full). Prose and broken JSON are not cached.
+    """
+    return bool(JSONArrayStream().feed(response)) or extract_json_object(response) is not None
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM responses in a SQLite file.
+    Entries expire ttl_seconds after they were written; once more than max_entries are stored the least
+    recently used ones are evicted. Keys are built by CachedLLM and are opaque to the cache.
+
+    param directory: Directory holding responses.sqlite.
+    param ttl_seconds: Age after which an entry is no longer served (None keeps entries forever).
+    param max_entries: Number of responses kept.
+    """
+    def __init__(self, directory=DEFAULT_LLM_CACHE_DIRECTORY, ttl_seconds=7 * 24 * 3600, max_entries=10_000):
+        os.makedirs(directory, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+        self.db = sqlite3.connect(os.path.join(directory, "responses.sqlite"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key BLOB PRIMARY KEY, response TEXT, created REAL, last_used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.db.commit()
+
+    def get(self, key):
+        """
+        Returns the cached response for key, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response):
+        """
+        Stores a response, evicting the least recently used entries beyond max_entries.
+        """
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, response, now, now))
+            excess = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evicted += excess
+            self.db.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters, the hit rate and the number of stored responses.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "entries": self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0],
+                "max_entries": self.max_entries,
+            }
+
+class CachedLLM(LLM):
+    """
+    Wraps a LangChain LLM so its responses are served from an LLMResponseCache.
+    The key is (model, temperature, sha256 of the rendered prompt, sample index). The sample index counts
+    how often this wrapper has seen the same prompt, so asking the same prompt n times replays n different
+    cached samples instead of one answer n times (which the quiz would reject as duplicates).
+    A cached sample the caller can no longer use (see is_stale) is skipped for the next one, and once the
+    cached samples run out the LLM is called, so replays never crowd out fresh answers.
+    Only responses holding usable JSON are cached (see is_cacheable). A stream the caller closes early is
+    closed on the wrapped LLM too, so generation stops; what was received is cached if it is usable (the
+    caller usually stops right after a complete object) and dropped otherwise (the caller gave up on it).
+
+    param llm: The wrapped LLM.
+    param response_cache: The LLMResponseCache to read and write (LangChain's own `cache` field is left alone).
+    param bypass: If True, always call the LLM; the fresh responses still replace the cached ones.
+    param is_stale: Optional callable taking a cached response and returning True if it is of no use any more,
+                    e.g. because its questions are already in the question bank.
+    """
+    llm: Any
+    response_cache: Any
+    bypass: bool = False
+    is_stale: Any = None
+
+    _samples: dict = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self):
+        return f"cached-{getattr(self.llm, '_llm_type', 'llm')}"
+
+    def reset_samples(self):
+        """
+        Starts counting samples from 0 again, so the next quiz replays the cached responses from the first.
+        """
+        with self._lock:
+            self._samples.clear()
+
+    def _key(self, prompt, stop):
+        prompt_hash = hashlib.sha256(f"{prompt}\0{stop or ''}".encode("utf-8")).hexdigest()
+        with self._lock:
+            sample = self._samples.get(prompt_hash, 0)
+            self._samples[prompt_hash] = sample + 1
+        model = getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None) or self._llm_type
+        temperature = getattr(self.llm, "temperature", None)
+        return hashlib.sha256(f"{model}\0{temperature}\0{prompt_hash}\0{sample}".encode("utf-8")).digest()
+
+    def _lookup(self, prompt, stop):
+        """
+        Returns (key, cached response) for the next usable sample of prompt, or (key, None) if the LLM must be
+        called; the fresh response is then cached under key.
+        """
+        while True:
+            key = self._key(prompt, stop)
+            if self.bypass:
+                return key, None
+            response = self.response_cache.get(key)
+            if response is None or self.is_stale is None or not self.is_stale(response):
+                return key, response
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        key, response = self._lookup(prompt, stop)
+        if response is not None:
+            return response
+        response = self.llm.invoke(prompt, stop=stop, **kwargs)
+        if is_cacheable(response):
+            self.response_cache.put(key, response)
+        return response
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        key, response = self._lookup(prompt, stop)
+        if response is not None:
+            yield GenerationChunk(text=response)
+            return
+        parts = []
+        stream = self.llm.stream(prompt, stop=stop, **kwargs)
+        try:
+            for chunk in stream:
+                parts.append(chunk)
+                yield GenerationChunk(text=chunk)
+        finally:
+            # Also runs when the caller stops reading: stop the wrapped LLM instead of paying for the rest
+            stream.close()
+            response = "".join(parts)
+            if is_cacheable(response):
+                self.response_cache.put(key, response)
@@ -1,17 +1,26 @@
-import streamlit as st
 import os
 import sys
 import json
-sys.path.append(os.path.abspath('../../'))
-from tasks.task_3.task_3 import DocumentProcessor
-from tasks.task_4.task_4 import EmbeddingClient
-from tasks.task_5.task_5 import ChromaCollectionCreator
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath('../../'))
+from tasks._lazy import lazy_import
+from tasks.task_8.context_scheduler import ContextScheduler
+from tasks.task_8.dedup_index import QuestionDedupIndex
+from tasks.task_8.json_stream import JSONArrayStream, JSONObjectStream, extract_json_object
+from tasks.task_8.llm_cache import CachedLLM
+from tasks.resources import get_registry
 
 from langchain_core.prompts import PromptTemplate
-from langchain_google_vertexai import VertexAI
+
+st = lazy_import("streamlit")
 
 class QuizGenerator:
-    def __init__(self, topic=None, num_questions=1, vectorstore=None):
+    def __init__(self, topic=None, num_questions=1, vectorstore=None, context_strategy=None, dedup_index=None,
+                 llm_cache=None, bypass_cache=False):
         """
         Initializes the QuizGenerator with a required topic, the number of questions for the quiz,
         and an optional vectorstore for querying related information.
@@ -19,6 +28,12 @@ class QuizGenerator:
         :param topic: A string representing the required topic of the quiz.
         :param num_questions: An integer representing the number of questions to generate for the quiz, up to a maximum of 10.
         :param vectorstore: An optional vectorstore instance (e.g., ChromaDB) to be used for querying information related to the quiz topic.
+        :param context_strategy: None to give every question the same top chunks, or "round_robin" / "mmr" to give
+                                 each question attempt its own slice of the relevant chunks (see ContextScheduler).
+        :param dedup_index: An optional QuestionDedupIndex shared with other generators, so questions already in a
+                            larger bank are rejected too. By default each generator owns one, cleared for every quiz.
+        :param llm_cache: An optional LLMResponseCache; LLM responses are then read from and written to it (see CachedLLM).
+        :param bypass_cache: If True, always call the LLM and refresh the cached responses.
         """
         if not topic:
             self.topic = "General Knowledge"
@@ -30,8 +45,27 @@ class QuizGenerator:
         self.num_questions = num_questions
 
         self.vectorstore = vectorstore
+        self.context_strategy = context_strategy
+        self.scheduler = None
         self.llm = None
+        self.llm_cache = llm_cache
+        self.bypass_cache = bypass_cache
         self.question_bank = [] # Initialize the question bank to store questions
+        self._owns_dedup_index = dedup_index is None
+        self.dedup_index = dedup_index if dedup_index is not None else QuestionDedupIndex()
+        self._chains = {} # Compiled prompt | llm chains, see _get_chain
+        self._retrieval_cache = {} # Retrieved context per (collection version, topic, k)
+        self._retrieval_lock = threading.Lock()
+        # Instrumentation: retrieval_seconds_saved estimates the time the memoized retrievals would have cost
+        self.stats = {"chain_builds": 0, "retrievals": 0, "retrieval_hits": 0,
+                      "retrieval_seconds": 0.0, "retrieval_seconds_saved": 0.0,
+                      "attempts": 0, "failed_attempts": 0, "accepted": 0, "aborted_streams": 0,
+                      "time_to_first_question": None, "time_to_quiz": None} # Seconds, for the last quiz
+        self._stats_lock = threading.Lock() # Guards counters updated from generation workers
+        self._attempts_left = 0 # Per-quiz budget, set by generate_quiz
+        self._deadline_at = None
+        self._on_question = None # Callback for every accepted question, set by generate_quiz
+        self._quiz_started_at = None
         self.system_template = """
             You are a subject matter expert on the topic: {topic}
             
@@ -54,6 +88,31 @@ class QuizGenerator:
                 "explanation": "<explanation as to why the answer is correct>"
             }}
             
+            Context: {context}
+            """
+        self.batch_template = """
+            You are a subject matter expert on the topic: {topic}
+            
+            Follow the instructions to create {num_questions} distinct quiz questions:
+            1. Generate each question based on the topic provided and context as key "question"
+            2. Provide 4 multiple choice answers to each question as a list of key-value pairs "choices"
+            3. Provide the correct answer for each question from its list of answers as key "answer"
+            4. Provide an explanation as to why the answer is correct as key "explanation"
+            5. Every question must ask about something different; do not repeat any of these questions: {existing}
+            
+            You must respond as a JSON array of {num_questions} objects, each with the following structure:
+            {{
+                "question": "<question>",
+                "choices": [
+                    {{"key": "A", "value": "<choice>"}},
+                    {{"key": "B", "value": "<choice>"}},
+                    {{"key": "C", "value": "<choice>"}},
+                    {{"key": "D", "value": "<choice>"}}
+                ],
+                "answer": "<answer key from choices list>",
+                "explanation": "<explanation as to why the answer is correct>"
+            }}
+            
             Context: {context}
             """
     
@@ -64,17 +123,94 @@ class QuizGenerator:
         This method should handle any setup required to interact with the LLM, including authentication,
         setting up any necessary parameters, or selecting a specific model.
 
+        The VertexAI client is shared process-wide through the resource registry, so only the first
+        generator pays for its construction and authentication.
+
         :return: An instance or configuration for the LLM.
         """
-        self.llm = VertexAI(
-            model_name = "gemini-pro",
-            temperature = 0.6, # Increased for less deterministic questions 
-            max_output_tokens = 500
+        def create_llm():
+            from langchain_google_vertexai import VertexAI # Imported on first use, it is slow to load
+            return VertexAI(
+                model_name = "gemini-pro",
+                temperature = 0.6, # Increased for less deterministic questions 
+                max_output_tokens = 500
+            )
+
+        self.llm = get_registry().get_or_create(("llm", "gemini-pro", 0.6, 500), create_llm)
+        if self.llm_cache is not None:
+            self.llm = CachedLLM(
+                llm=self.llm, response_cache=self.llm_cache, bypass=self.bypass_cache,
+                is_stale=self._is_stale_response,
+            )
+
+    def _is_stale_response(self, response):
+        """
+        True if a cached response cannot add anything to the quiz: every question in it is already in the
+        dedup index (e.g. it was stored in the question bank when it was first generated) or it has none.
+        Such replays are skipped by CachedLLM instead of spending attempts on certain rejections.
+        """
+        elements = list(JSONArrayStream().feed(response))  # Batch responses are JSON arrays
+        questions = [extract_json_object(element) for element in elements] if elements else [extract_json_object(response)]
+        texts = [
+            question["question"] for question in questions
+            if isinstance(question, dict) and isinstance(question.get("question"), str)
+        ]
+        return not texts or all(self.dedup_index.find_duplicate(text) is not None for text in texts)
+
+    def _retrieve_context(self, k=4):
+        """
+        Returns the context for the topic, retrieving it only once per (collection version, topic, k).
+        The collection version changes whenever documents are added, which invalidates the memo.
+        The lock makes concurrent workers wait for the first retrieval instead of repeating it.
+        """
+        db = self.vectorstore.db
+        key = (getattr(self.vectorstore, "version", None), id(db), self.topic, k)
+        with self._retrieval_lock:
+            context = self._retrieval_cache.get(key)
+            if context is not None:
+                self.stats["retrieval_hits"] += 1
+                self.stats["retrieval_seconds_saved"] += self.stats["retrieval_seconds"] / self.stats["retrievals"]
+                return context
+            start = time.perf_counter()
+            documents = db.similarity_search(self.topic, k=k)
+            context = "\n\n".join(document.page_content for document in documents)
+            self.stats["retrievals"] += 1
+            self.stats["retrieval_seconds"] += time.perf_counter() - start
+            self._retrieval_cache[key] = context
+            return context
+
+    def _get_chain(self, template):
+        """
+        Returns the prompt | llm chain for a template, compiled once per template and LLM instance.
+        """
+        key = (template, id(self.llm))
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = PromptTemplate.from_template(template) | self.llm
+            self._chains[key] = chain
+            self.stats["chain_builds"] += 1
+        return chain
+
+    def _reset_scheduler(self):
+        self.scheduler = ContextScheduler(
+            self.vectorstore.db, self.topic, self.num_questions, strategy=self.context_strategy
         )
 
+    def retries_per_question(self):
+        """
+        LLM calls that did not produce an accepted question, per accepted question, since creation.
+        A batch call that adds several questions counts as one call, so this is not attempts - accepted.
+        """
+        accepted = self.stats["accepted"]
+        return self.stats["failed_attempts"] / accepted if accepted else None
+
     def generate_question_with_vectorstore(self):
         """
-        Generates a quiz question based on the topic provided using a vectorstore
+        Generates a quiz question based on the topic provided using a vectorstore.
+        The prompt chain is compiled once and the retrieved context is memoized (see _retrieve_context),
+        so repeated calls only pay for the LLM.
+        The response is streamed and stops as soon as the JSON object is complete, or as soon as it is clear
+        the model is not writing one (see JSONObjectStream), so a bad answer does not cost a full response.
 
         :return: A JSON object representing the generated quiz question.
         """
@@ -82,77 +218,295 @@ class QuizGenerator:
             self.init_llm()
         if not self.vectorstore:
             raise ValueError("Vectorstore not provided.")
-        
-        from langchain_core.runnables import RunnablePassthrough, RunnableParallel
-
-        retriever = self.vectorstore.db.as_retriever()
-        
-        # Use the system template to create a PromptTemplate
-        prompt = PromptTemplate.from_template(self.system_template)
-        
-        setup_and_retrieval = RunnableParallel(
-            {"context": retriever, "topic": RunnablePassthrough()}
-        )
-        # Create a chain with the Retriever, PromptTemplate, and LLM
-        chain = setup_and_retrieval | prompt | self.llm 
 
-        # Invoke the chain with the topic as input
-        response = chain.invoke(self.topic)
-        return response
+        if self.context_strategy:
+            if self.scheduler is None:
+                self._reset_scheduler()
+            context = self.scheduler.next_context()
+        else:
+            context = self._retrieve_context()
+        chain = self._get_chain(self.system_template)
+
+        # Stream the chain with the topic and the retrieved context
+        parser = JSONObjectStream()
+        parts = []
+        stream = chain.stream({"topic": self.topic, "context": context})
+        try:
+            for chunk in stream:
+                parts.append(chunk)
+                question_str = parser.feed(chunk)
+                if question_str is not None:
+                    return question_str
+                if parser.failed:
+                    with self._stats_lock:
+                        self.stats["aborted_streams"] += 1
+                    break
+        finally:
+            stream.close()
+        return "".join(parts)
+
+    def generate_questions_batch(self, num_questions):
+        """
+        Asks the LLM for num_questions questions as one JSON array in a single call, so the prompt and
+        the retrieved context are paid for once. The response is streamed and every array element is
+        validated and added to the question bank as soon as it is complete; the stream is closed early
+        once the bank is full.
+
+        :return: The number of questions added to the question bank.
+        """
+        if not self.llm:
+            self.init_llm()
+        if not self.vectorstore:
+            raise ValueError("Vectorstore not provided.")
+
+        chain = self._get_chain(self.batch_template)
+        inputs = {
+            "topic": self.topic,
+            "context": self._retrieve_context(),
+            "num_questions": str(num_questions),
+            "existing": json.dumps([question["question"] for question in self.question_bank]),
+        }
 
-    def generate_quiz(self) -> list:
+        added = 0
+        parser = JSONArrayStream()
+        stream = chain.stream(inputs)
+        try:
+            for chunk in stream:
+                for element in parser.feed(chunk):
+                    if self._accept(element):
+                        added += 1
+                    if len(self.question_bank) >= self.num_questions:
+                        return added
+                if parser.finished:
+                    break
+                if parser.failed:
+                    with self._stats_lock:
+                        self.stats["aborted_streams"] += 1
+                    break
+        finally:
+            stream.close()  # Stops generation if we are done before the model is
+        return added
+
+    def generate_quiz(self, max_concurrency=1, batch=False, max_batch_calls=3, max_attempts=None, deadline=None,
+                      on_question=None) -> list:
         """
         Generate a list of unique quiz questions based on the specified topic and number of questions.
+        Generation stops once the quiz is full or the attempt budget is spent, whichever comes first, so a
+        misbehaving model returns a short quiz instead of looping forever.
+        Parameters:
+        - max_concurrency: Maximum number of LLM requests in flight. 1 keeps the original sequential loop.
+        - batch: If True, ask for all questions in one call (see generate_questions_batch) and only
+          request the shortfall in follow-up calls.
+        - max_batch_calls: In batch mode, the most single-call attempts before falling back to one
+          question per call for whatever is still missing.
+        - max_attempts: The most LLM calls for this quiz (a batch call counts as one). Defaults to 3 per question.
+        - deadline: Optional wall-clock budget in seconds. No new LLM call starts after it; in concurrent
+          mode requests still running at the deadline are abandoned.
+        - on_question: Optional callback called with every question as soon as it is accepted, so callers can
+          show the first questions while the rest are generated (see iter_quiz).
         Returns:
         - A list of dictionaries, where each dictionary represents a unique quiz question generated based on the topic.
         """
         self.question_bank = [] # Reset the question bank
+        self._on_question = on_question
+        self._quiz_started_at = time.monotonic()
+        self.stats["time_to_first_question"] = None
+        if self._owns_dedup_index:
+            self.dedup_index.clear()
+        if self.context_strategy and self.vectorstore:
+            self._reset_scheduler() # Every quiz walks the context slices from the start
+        if isinstance(self.llm, CachedLLM):
+            self.llm.reset_samples() # A repeated quiz replays the cached responses in the same order
+        self._attempts_left = max_attempts if max_attempts is not None else 3 * self.num_questions
+        self._deadline_at = time.monotonic() + deadline if deadline is not None else None
 
-        additional_questions = 0 # Keep track of the number of additional questions generated
-        iteration = 0 # Keep track of the number of iterations
-        while(iteration<self.num_questions+additional_questions):
-            iteration += 1
-            question_str = self.generate_question_with_vectorstore()
+        if batch:
+            for _ in range(max_batch_calls):
+                missing = self.num_questions - len(self.question_bank)
+                if missing <= 0 or not self._take_attempt():
+                    break
+                if not self.generate_questions_batch(missing):
+                    self.stats["failed_attempts"] += 1
+
+        if max_concurrency > 1:
+            self._generate_quiz_concurrently(max_concurrency)
+        else:
+            while len(self.question_bank) < self.num_questions and self._take_attempt():
+                question_str = self.generate_question_with_vectorstore()
+                if not self._accept(question_str):
+                    self.stats["failed_attempts"] += 1
+
+        if len(self.question_bank) < self.num_questions:
+            print(f"Attempt budget spent with {len(self.question_bank)} of {self.num_questions} questions.")
+        self.stats["time_to_quiz"] = time.monotonic() - self._quiz_started_at
+        return self.question_bank
+
+    def iter_quiz(self, **kwargs):
+        """
+        Generates a quiz like generate_quiz (same keyword arguments) but yields every question as soon as it is
+        accepted. Generation runs in a background thread, so a consumer that renders each question does not
+        slow it down. Exceptions from generation are re-raised to the consumer.
+        """
+        questions = queue.Queue()
+        done = object()
+
+        def run():
             try:
-                question = json.loads(question_str)
-            except json.JSONDecodeError:
-                print("Failed to decode question JSON.")
-                additional_questions += 1
-                continue  # Skip this iteration if JSON decoding fails
-            # Validate the question using the validate_question method
-            if self.validate_question(question):
-                print("Successfully generated unique question")
-                self.question_bank.append(question)
-                # Add the valid and unique question to the bank
-            else:
-                print("Duplicate or invalid question detected.")
-                additional_questions += 1
+                self.generate_quiz(on_question=questions.put, **kwargs)
+            except Exception as e:
+                questions.put(e)
+            finally:
+                questions.put(done)
+
+        threading.Thread(target=run, name="quiz-generation", daemon=True).start()
+        while True:
+            item = questions.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _take_attempt(self) -> bool:
+        """
+        Spends one LLM call of the quiz budget and counts it in stats["attempts"].
+        Returns False once no calls or no time are left.
+        """
+        if self._attempts_left <= 0 or self._seconds_left() == 0:
+            return False
+        self._attempts_left -= 1
+        self.stats["attempts"] += 1
+        return True
+
+    def _seconds_left(self):
+        """
+        Seconds until the quiz deadline (0 once it has passed), or None without a deadline.
+        """
+        if self._deadline_at is None:
+            return None
+        return max(0.0, self._deadline_at - time.monotonic())
+
+    def _generate_quiz_concurrently(self, max_concurrency):
+        """
+        Issues question requests from a thread pool and validates results in arrival order.
+        Up to max_concurrency requests are in flight, but never more than the questions still missing
+        plus the number rejected so far (a model that repeats itself gets more speculative requests).
+        Requests still outstanding once the bank is full, or once the deadline passes, are abandoned.
+        """
+        # Create the LLM up front so the workers do not race to initialise it
+        if not self.llm:
+            self.init_llm()
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="quiz-question")
+        pending = set()
+        rejected = 0
+        try:
+            while len(self.question_bank) < self.num_questions:
+                missing = self.num_questions - len(self.question_bank)
+                while len(pending) < min(max_concurrency, missing + rejected) and self._take_attempt():
+                    pending.add(executor.submit(self.generate_question_with_vectorstore))
+                if not pending:
+                    break
+                done, pending = wait(pending, timeout=self._seconds_left(), return_when=FIRST_COMPLETED)
+                if not done:
+                    break # Deadline passed with every request still running
+                for future in done:
+                    if len(self.question_bank) >= self.num_questions:
+                        break
+                    try:
+                        question_str = future.result()
+                    except Exception as e:
+                        print(f"Question request failed: {e}")
+                        rejected += 1
+                        self.stats["failed_attempts"] += 1
+                        continue
+                    if not self._accept(question_str):
+                        rejected += 1
+                        self.stats["failed_attempts"] += 1
+        finally:
+            # Drop queued requests; the ones already running finish in the background and are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
 
         return self.question_bank
 
+    def _accept(self, question_str) -> bool:
+        """
+        Parses an LLM response and adds it to the question bank if it is a valid, unique question.
+        Returns True if the question was added.
+        """
+        accepted = self._parse_and_add(question_str)
+        self.stats["accepted"] += int(accepted)
+        if self.scheduler is not None:
+            self.scheduler.record(accepted)
+        return accepted
+
+    def _parse_and_add(self, question_str) -> bool:
+        question = extract_json_object(question_str)
+        if question is None:
+            print("Failed to decode question JSON.")
+            return False # Skip this response if no JSON object can be extracted
+        if not self.validate_schema(question):
+            print("Question JSON does not match the expected structure.")
+            return False
+        # validate_schema checked the text; claiming it in the dedup index is the uniqueness check, done once
+        # (one signature per question) and atomically, so concurrent workers cannot both add it
+        if self.dedup_index.add_if_unique(question["question"]):
+            print("Successfully generated unique question")
+            self.question_bank.append(question)
+            # Add the valid and unique question to the bank
+            if len(self.question_bank) == 1 and self._quiz_started_at is not None:
+                self.stats["time_to_first_question"] = time.monotonic() - self._quiz_started_at
+            if self._on_question is not None:
+                self._on_question(question)
+            return True
+        print("Duplicate or invalid question detected.")
+        return False
+
+    def validate_schema(self, question) -> bool:
+        """
+        Check that a parsed question has the structure the quiz screen relies on: a non-empty "question",
+        exactly 4 "choices" with distinct string "key"s and string "value"s, an "answer" that is one of the
+        choice keys and a non-empty "explanation".
+        """
+        if not isinstance(question, dict):
+            return False
+        for field in ("question", "explanation"):
+            if not isinstance(question.get(field), str) or not question[field].strip():
+                return False
+        choices = question.get("choices")
+        if not isinstance(choices, list) or len(choices) != 4:
+            return False
+        keys = []
+        for choice in choices:
+            if not isinstance(choice, dict) or not isinstance(choice.get("key"), str) or not isinstance(choice.get("value"), str):
+                return False
+            keys.append(choice["key"])
+        return len(set(keys)) == 4 and question.get("answer") in keys
+
     def validate_question(self, question: dict) -> bool:
         """
         Validate a quiz question for uniqueness within the generated quiz.
+        Near-duplicates (reworded copies of a question already in the bank) are detected with the
+        MinHash/LSH dedup index, so the check does not scan the whole bank.
         Parameters:
         - question: A dictionary representing the generated quiz question, expected to contain at least a "question" key.
         Returns:
         - A boolean value: True if the question is unique, False otherwise.
         """
+        if not isinstance(question, dict):
+            return False
+        text = question.get("question")
+        if not isinstance(text, str) or not text.strip():
+            return False
 
-        if question["question"] is None:
-            is_unique = False
-        # Check if a question with the same text already exists in the self.question_bank
-        is_unique = True
-        for question_dict in self.question_bank:
-            if question_dict["question"] == question["question"]:
-                is_unique = False
-                break
-
-        return is_unique
+        return self.dedup_index.find_duplicate(text) is None
 
 
 # Test Generating the Quiz
 if __name__ == "__main__":
+    from tasks.task_3.task_3 import DocumentProcessor
+    from tasks.task_4.task_4 import EmbeddingClient
+    from tasks.task_5.task_5 import ChromaCollectionCreator
     
     embed_config = {
         "model_name": "textembedding-gecko@003",
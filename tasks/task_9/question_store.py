@@ -0,0 +1,161 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+
+DEFAULT_QUESTION_STORE_PATH = os.path.join(tempfile.gettempdir(), "quizify_question_bank", "question_bank.sqlite")
+
+def normalize_topic(topic):
+    """
+    Topics are matched case- and whitespace-insensitively ("Cell  Biology" is "cell biology").
+    """
+    return " ".join((topic or "").lower().split())
+
+class QuestionStore:
+    """
+    Persistent bank of generated quiz questions in SQLite, indexed by (corpus hash, topic, creation time).
+    A question is stored once per corpus and topic; times_served counts how often it was handed out, so
+    take() can serve the least used questions first and repeated quizzes rotate through the bank.
+
+    param path: The SQLite file.
+    """
+    def __init__(self, path=DEFAULT_QUESTION_STORE_PATH):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                corpus_hash TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                question_text TEXT NOT NULL,
+                question_json TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                times_served INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (corpus_hash, topic, question_text)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS questions_pair_created ON questions (corpus_hash, topic, created_at)")
+        self.db.commit()
+
+    def add_many(self, corpus_hash, topic, questions):
+        """
+        Stores questions for a (corpus, topic) pair, skipping ones already stored. Returns the number added.
+        """
+        topic = normalize_topic(topic)
+        now = time.time()
+        rows = [(corpus_hash, topic, question["question"], json.dumps(question), now) for question in questions]
+        with self.lock:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO questions (corpus_hash, topic, question_text, question_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.db.commit()
+            return self.db.total_changes - before
+
+    def add(self, corpus_hash, topic, question, served=False):
+        """
+        Stores one question and returns its ID, or None if the pair already has it.
+        With served, it is stored as already handed out (it is being shown right away).
+        """
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO questions (corpus_hash, topic, question_text, question_json, created_at, times_served) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (corpus_hash, normalize_topic(topic), question["question"], json.dumps(question), time.time(), int(served)),
+            )
+            self.db.commit()
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def count(self, corpus_hash, topic, unserved_only=False):
+        """
+        Returns the number of stored questions for a (corpus, topic) pair, or only of those never served.
+        """
+        query = "SELECT COUNT(*) FROM questions WHERE corpus_hash = ? AND topic = ?"
+        if unserved_only:
+            query += " AND times_served = 0"
+        with self.lock:
+            return self.db.execute(query, (corpus_hash, normalize_topic(topic))).fetchone()[0]
+
+    def question_texts(self, corpus_hash, topic):
+        """
+        Returns the text of every stored question for a pair, e.g. to seed a QuestionDedupIndex.
+        """
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT question_text FROM questions WHERE corpus_hash = ? AND topic = ?",
+                (corpus_hash, normalize_topic(topic)),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def take(self, corpus_hash, topic, n):
+        """
+        Picks up to n questions for a pair, least served first (newest first among equals), marks them as
+        served and returns their IDs. Only IDs are returned; load questions with get_many or StoredQuestions.
+        """
+        with self.lock:
+            ids = [row[0] for row in self.db.execute(
+                "SELECT id FROM questions WHERE corpus_hash = ? AND topic = ? "
+                "ORDER BY times_served, created_at DESC LIMIT ?",
+                (corpus_hash, normalize_topic(topic), n),
+            )]
+            self.db.executemany("UPDATE questions SET times_served = times_served + 1 WHERE id = ?", [(i,) for i in ids])
+            self.db.commit()
+        return ids
+
+    def get_many(self, ids):
+        """
+        Returns the questions (dicts) with the given IDs, in the same order.
+        """
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        with self.lock:
+            rows = dict(self.db.execute(f"SELECT id, question_json FROM questions WHERE id IN ({placeholders})", list(ids)))
+        return [json.loads(rows[i]) for i in ids]
+
+class StoredQuestions(Sequence):
+    """
+    A quiz as a read-only sequence of question IDs whose questions are loaded from a QuestionStore on demand,
+    page_size at a time, keeping at most max_pages pages in memory. Only the IDs live in the session state.
+    A list of IDs is used as is, not copied, so a quiz still being generated can grow while it is shown.
+
+    param store: The QuestionStore holding the questions.
+    param ids: The question IDs of the quiz, in order.
+    """
+    def __init__(self, store, ids, page_size=5, max_pages=4):
+        self.store = store
+        self.ids = ids if isinstance(ids, list) else list(ids)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("question index out of range")
+        page_number = index // self.page_size
+        page = self._pages.get(page_number)
+        if page is None or index % self.page_size >= len(page):  # Missing, or loaded before the quiz grew
+            start = page_number * self.page_size
+            page = self.store.get_many(self.ids[start:start + self.page_size])
+            self._pages[page_number] = page
+            if len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_number)
+        return page[index % self.page_size]
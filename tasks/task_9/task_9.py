@@ -1,12 +1,12 @@
-import streamlit as st
 import os
 import sys
 import json
-sys.path.append(os.path.abspath('../../'))
-from tasks.task_3.task_3 import DocumentProcessor
-from tasks.task_4.task_4 import EmbeddingClient
-from tasks.task_5.task_5 import ChromaCollectionCreator
-from tasks.task_8.task_8 import QuizGenerator
+if __name__ == "__main__":
+    sys.path.append(os.path.abspath('../../'))
+from tasks._lazy import lazy_import
+from tasks.task_9.question_store import StoredQuestions
+
+st = lazy_import("streamlit")  # Only next_question_index touches the session state
 
 class QuizManager:
     def __init__(self, questions: list):
@@ -14,9 +14,23 @@ class QuizManager:
         Task: Initialize the QuizManager class with a list of quiz questions.
         Parameters:
         - questions: A list of dictionaries, where each dictionary represents a quiz question along with its choices, correct answer, and an explanation.
+          Any sequence works, e.g. StoredQuestions, which loads questions from a QuestionStore only when they are shown.
         """
         self.questions = questions
-        self.total_questions = len(questions)
+
+    @classmethod
+    def from_store(cls, store, question_ids):
+        """
+        Creates a QuizManager over stored questions, paging them in by index instead of loading the whole quiz.
+        Parameters:
+        - store: The QuestionStore holding the questions.
+        - question_ids: The IDs of the quiz questions, in order (see QuestionStore.take).
+        """
+        return cls(StoredQuestions(store, question_ids))
+
+    @property
+    def total_questions(self):
+        return len(self.questions)
 
     def get_question_at_index(self, index: int):
         """
@@ -39,6 +53,10 @@ class QuizManager:
 
 # Test Generating the Quiz
 if __name__ == "__main__":
+    from tasks.task_3.task_3 import DocumentProcessor
+    from tasks.task_4.task_4 import EmbeddingClient
+    from tasks.task_5.task_5 import ChromaCollectionCreator
+    from tasks.task_8.task_8 import QuizGenerator
     
     embed_config = {
         "model_name": "textembedding-gecko@003",
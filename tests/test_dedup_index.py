@@ -0,0 +1,60 @@
+from tasks.task_8.dedup_index import QuestionDedupIndex, bands_for_threshold, normalize_question
+
+QUESTION = "Which organelle produces most of the energy in a eukaryotic cell?"
+REWORDED = "Which organelle makes most of the energy in a eukaryotic cell?"
+
+def estimated_similarity(index, a, b):
+    signature_a = index._signature(normalize_question(a))
+    signature_b = index._signature(normalize_question(b))
+    return float((signature_a == signature_b).mean())
+
+def test_exact_and_normalized_matches():
+    index = QuestionDedupIndex()
+    index.add("What is DNA?")
+    assert index.find_duplicate("What is DNA?") == "What is DNA?"
+    assert index.find_duplicate("  what is   dna") == "What is DNA?"
+
+def test_reworded_question_is_a_duplicate():
+    index = QuestionDedupIndex()
+    index.add(QUESTION)
+    assert index.find_duplicate(REWORDED) == QUESTION
+    assert index.find_duplicate("In a eukaryotic cell, which organelle produces most of the energy?") == QUESTION
+
+def test_reworded_question_at_the_threshold():
+    similarity = estimated_similarity(QuestionDedupIndex(), QUESTION, REWORDED)
+    assert 0.75 <= similarity < 1
+
+    at_threshold = QuestionDedupIndex(threshold=similarity)
+    at_threshold.add(QUESTION)
+    assert at_threshold.find_duplicate(REWORDED) == QUESTION
+
+    above_threshold = QuestionDedupIndex(threshold=similarity + 1 / 128)
+    above_threshold.add(QUESTION)
+    assert above_threshold.find_duplicate(REWORDED) is None
+
+def test_different_numbers_are_not_duplicates():
+    index = QuestionDedupIndex()
+    index.add("Which war started in 1914 in Europe?")
+    assert index.find_duplicate("Which war started in 1939 in Europe?") is None
+
+def test_different_questions_are_unique():
+    index = QuestionDedupIndex()
+    index.add(QUESTION)
+    assert index.find_duplicate("What is the function of the ribosome in a cell?") is None
+
+def test_add_if_unique_and_clear():
+    index = QuestionDedupIndex()
+    assert index.add_if_unique(QUESTION)
+    assert not index.add_if_unique(REWORDED)
+    assert len(index) == 1
+    index.clear()
+    assert len(index) == 0
+    assert index.find_duplicate(QUESTION) is None
+    assert index.add_if_unique(REWORDED)
+
+def test_bands_for_threshold():
+    assert bands_for_threshold(0.75, 128) == 16
+    for threshold in (0.5, 0.75, 0.9):
+        bands = bands_for_threshold(threshold, 128)
+        assert 128 % bands == 0
+        assert (1 / bands) ** (bands / 128) <= threshold
@@ -0,0 +1,78 @@
+import json
+from tasks.task_8.json_stream import JSONArrayStream, JSONObjectStream, extract_json_object
+
+QUESTION = {
+    "question": 'Which bracket closes "{[" in JSON?',
+    "choices": [{"key": "A", "value": "} then ]"}, {"key": "B", "value": "a \\\" quote"}],
+    "answer": "A",
+    "explanation": "Brackets and braces inside strings are text, not structure.",
+}
+
+def feed_in_chunks(stream, text, size):
+    found = []
+    for i in range(0, len(text), size):
+        result = stream.feed(text[i:i + size])
+        if isinstance(result, list):
+            found.extend(result)
+        elif result is not None:
+            found.append(result)
+    return found
+
+def test_array_stream_skips_fence_and_returns_every_element():
+    elements = [QUESTION, {"question": "Second?"}]
+    text = "```json\n" + json.dumps(elements, indent=2) + "\n```"
+    stream = JSONArrayStream()
+    assert [json.loads(element) for element in stream.feed(text)] == elements
+    assert stream.finished and not stream.failed
+
+def test_array_stream_elements_spanning_chunks():
+    elements = [QUESTION, {"question": "Second?"}, {"question": "Third?"}]
+    text = "Here you go:\n" + json.dumps(elements)
+    for size in (1, 3, 7, 50):
+        stream = JSONArrayStream()
+        assert [json.loads(element) for element in feed_in_chunks(stream, text, size)] == elements
+        assert stream.finished
+
+def test_array_stream_reports_elements_before_the_array_ends():
+    stream = JSONArrayStream()
+    assert stream.feed('[{"question": "First?"}, {"question": "Sec') == ['{"question": "First?"}']
+    assert stream.feed('ond?"}]') == ['{"question": "Second?"}']
+
+def test_array_stream_fails_on_lone_object_or_long_preamble():
+    stream = JSONArrayStream()
+    assert stream.feed(json.dumps(QUESTION)) == []
+    assert stream.failed
+
+    stream = JSONArrayStream(max_preamble=10)
+    stream.feed("I am sorry, I cannot write a quiz about that.")
+    assert stream.failed
+
+def test_object_stream_ignores_brackets_and_escaped_quotes_in_strings():
+    text = "```json\n" + json.dumps(QUESTION) + "\n```"
+    for size in (1, 4, len(text)):
+        stream = JSONObjectStream()
+        found = feed_in_chunks(stream, text, size)
+        assert len(found) == 1 and json.loads(found[0]) == QUESTION
+        assert stream.finished and not stream.failed
+
+def test_object_stream_returns_before_trailing_text():
+    stream = JSONObjectStream()
+    assert stream.feed('Sure! {"question": "Why?"} Let me know if') == '{"question": "Why?"}'
+    assert stream.feed(" you want more.") is None
+
+def test_object_stream_fails_on_mismatched_brackets():
+    stream = JSONObjectStream()
+    assert stream.feed('{"choices": [{"key": "A"}}') is None
+    assert stream.failed
+
+def test_object_stream_fails_on_long_preamble():
+    stream = JSONObjectStream(max_preamble=10)
+    assert stream.feed("No JSON in this answer at all.") is None
+    assert stream.failed
+
+def test_extract_json_object():
+    assert extract_json_object(json.dumps(QUESTION)) == QUESTION
+    assert extract_json_object("```json\n" + json.dumps(QUESTION) + "\n```") == QUESTION
+    assert extract_json_object("Here is your question: " + json.dumps(QUESTION) + " Good luck!") == QUESTION
+    assert extract_json_object('{"question": "Unterminated"') is None
+    assert extract_json_object("no object here") is None